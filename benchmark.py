@@ -0,0 +1,175 @@
+import json
+import time
+import random
+import argparse
+import platform
+
+import pygame
+
+from game import Game, LEVELS_ORDER
+from scripts.entities import PhysicsEntity
+from scripts.level import prepare_tilemap
+from scripts.tilemap import Tilemap
+
+## (map width in tiles, height in tiles, enemies)
+SYNTHETIC_SIZES = [
+  (64, 32, 10),
+  (256, 64, 50),
+  (1024, 128, 200),
+]
+
+def measure(fn, number, repeat = 3):
+  ## Best of `repeat` runs, in microseconds per call
+  best = None
+  for _ in range(repeat):
+    start = time.perf_counter()
+    for _ in range(number):
+      fn()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return round(best / number * 1e6, 3)
+
+def generate_map(game, width, height, enemy_count, seed = 0):
+  ## Ground with gaps, floating platforms, stone pillars, decorations and spawners
+  rng = random.Random(seed)
+  tilemap = Tilemap(game, tile_size=16)
+  ground = height - 4
+
+  for x in range(width):
+    if x > 4 and rng.random() < 0.05:
+      continue
+    for y in range(ground, height):
+      tilemap.set_tile((x, y), {'type': 'grass' if y == ground else 'stone', 'variant': 1})
+
+  for _ in range(width * height // 64):
+    x = rng.randrange(width - 8)
+    y = rng.randrange(2, ground - 3)
+    for i in range(rng.randint(3, 8)):
+      tilemap.set_tile((x + i, y), {'type': rng.choice(['grass', 'stone']), 'variant': 1})
+
+  for _ in range(width // 8):
+    x = rng.randrange(width)
+    for y in range(ground - rng.randint(1, 4), ground):
+      tilemap.set_tile((x, y), {'type': 'stone', 'variant': 4})
+
+  tilemap.autotile()
+
+  for _ in range(width // 2):
+    decor = rng.choice([('decor', rng.randrange(4)), ('large_decor', rng.randrange(3))])
+    tilemap.add_offgrid({'type': decor[0], 'variant': decor[1], 'pos': [rng.random() * width * 16, (ground - 1) * 16 + rng.random() * 8]})
+
+  tilemap.add_offgrid({'type': 'spawners', 'variant': 0, 'pos': [32, (ground - 1) * 16]})
+  for _ in range(enemy_count):
+    tilemap.add_offgrid({'type': 'spawners', 'variant': rng.choice([1, 1, 2]), 'pos': [rng.randrange(8, width) * 16, (ground - 1) * 16]})
+
+  return tilemap
+
+def benchmark_level(game, level, quick = False):
+  scale = 0.1 if quick else 1
+  game.apply_level(level)
+  tilemap = game.tilemap
+  results = {}
+
+  xs = [loc[0] for loc in tilemap.tilemap]
+  ys = [loc[1] for loc in tilemap.tilemap]
+  bounds = (min(xs) * 16, min(ys) * 16, (max(xs) + 1) * 16, (max(ys) + 1) * 16)
+  rng = random.Random(1)
+  points = [(rng.uniform(bounds[0], bounds[2]), rng.uniform(bounds[1], bounds[3])) for _ in range(1024)]
+  offsets = [(int(p[0]) - 160, int(p[1]) - 120) for p in points[:64]]
+
+  def cycle(items):
+    state = [0]
+    def next_item():
+      state[0] = (state[0] + 1) % len(items)
+      return items[state[0]]
+    return next_item
+
+  next_point = cycle(points)
+  results['tiles_around'] = measure(lambda: tilemap.tiles_around(next_point()), int(20000 * scale))
+  results['physics_rect_around'] = measure(lambda: tilemap.physics_rect_around(next_point()), int(20000 * scale))
+  results['is_solid_block'] = measure(lambda: tilemap.is_solid_block(next_point()), int(20000 * scale))
+
+  surf = pygame.Surface((320, 240), pygame.SRCALPHA)
+  next_offset = cycle(offsets)
+  results['render'] = measure(lambda: tilemap.render(surf, next_offset()), int(500 * scale) or 1)
+
+  results['autotile'] = measure(tilemap.autotile, int(20 * scale) or 1, repeat=1)
+  results['extract'] = measure(lambda: tilemap.extract([('large_decor', 2), ('spawners', 0)], keep=True), int(200 * scale) or 1)
+
+  ## Collision of one falling, sliding entity
+  entity = PhysicsEntity(game, 'enemy', level.player_spawn, (8, 15))
+  def physics_step():
+    if entity.velocity[1] == 0 and entity.colisions['down']:
+      entity.pos = list(next_point())
+    PhysicsEntity.update(entity, tilemap, (1, 0))
+  results['physics_entity_update'] = measure(physics_step, int(20000 * scale))
+
+  ## Whole frames, simulation and drawing, from the level start
+  level.restore()
+  game.apply_level(level)
+  game.transition = 0
+  frames = int(300 * scale) or 1
+  results['game_frame'] = measure(lambda: game.step(1, render=True), frames, repeat=1)
+  results['game_update'] = measure(game.step, frames, repeat=1)
+
+  results['tiles'] = len(tilemap.tilemap)
+  results['offgrid_tiles'] = len(tilemap.offgrid_tiles)
+  results['enemies'] = len(level.enemy_spawns)
+  return results
+
+def compare(old_path, new_results):
+  file_connection = open(old_path, 'r') # Reading
+  old = json.load(file_connection)['results']
+  file_connection.close()
+
+  print('')
+  print('Compared to ' + old_path + ' (new / old, lower is faster)')
+  for level_name in new_results:
+    if level_name not in old:
+      continue
+    for name, value in new_results[level_name].items():
+      old_value = old[level_name].get(name)
+      if name in ('tiles', 'offgrid_tiles', 'enemies') or not old_value:
+        continue
+      print('  ' + level_name.ljust(24) + name.ljust(24) + format(value / old_value, '.2f') + 'x')
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Benchmarks the tilemap, physics and full frames on every level')
+  parser.add_argument('--output', metavar='PATH', help='write the results as JSON to PATH')
+  parser.add_argument('--compare', metavar='PATH', help='print the speed ratio against an earlier results file')
+  parser.add_argument('--quick', action='store_true', help='run a tenth of the iterations')
+  parser.add_argument('--only', metavar='NAME', help='only levels whose name contains NAME')
+  args = parser.parse_args()
+
+  game = Game(headless=True, seed=0)
+  levels = [(map_id, game.levels.get(map_id)) for map_id in LEVELS_ORDER]
+  for width, height, enemy_count in SYNTHETIC_SIZES:
+    map_id = 'synthetic_' + str(width) + 'x' + str(height) + '_' + str(enemy_count)
+    levels.append((map_id, prepare_tilemap(map_id, generate_map(game, width, height, enemy_count))))
+
+  results = {}
+  for map_id, level in levels:
+    if args.only and args.only not in map_id:
+      continue
+    results[map_id] = benchmark_level(game, level, args.quick)
+    print(map_id)
+    for name, value in results[map_id].items():
+      print('  ' + name.ljust(24) + str(value) + ('' if name in ('tiles', 'offgrid_tiles', 'enemies') else ' us'))
+
+  if args.output:
+    report = {
+      'meta': {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'quick': args.quick,
+      },
+      'results': results,
+    }
+    file_connection = open(args.output, 'w') # Writing
+    json.dump(report, file_connection, indent=2)
+    file_connection.close()
+
+  if args.compare:
+    compare(args.compare, results)
@@ -1,30 +1,33 @@
 import sys
+import argparse
 import pygame
 
-from scripts.utils import Mouse_button, load_images
+from scripts.utils import Mouse_button
+from scripts.asset_bundle import AssetBundle
 from scripts.tilemap import Tilemap
-
-RENDER_SCALE = 2.0
+from scripts.presenter import DEFAULT_WINDOW_SIZE, Presenter, parse_window_size
 
 class Editor:
-  def __init__(self):
+  def __init__(self, window_size = DEFAULT_WINDOW_SIZE):
     pygame.init()
     pygame.display.set_caption('ninja game EDITOR')
     
-    self.screen = pygame.display.set_mode((640, 480)) ## X, Y
+    self.screen = pygame.display.set_mode(window_size) ## X, Y
     self.display = pygame.Surface((320, 240))
+    self.presenter = Presenter(self.screen, self.display)
     
     self.clock = pygame.time.Clock()
     
     pygame.font.init()
     self.my_font = pygame.font.SysFont('Comic Sans MS', 10)
     
+    images = AssetBundle.load().images
     self.assets = {
-      'grass': load_images('tiles/grass'),
-      'stone': load_images('tiles/stone'),
-      'decor': load_images('tiles/decor'),
-      'large_decor': load_images('tiles/large_decor'),
-      'spawners': load_images('tiles/spawners'),
+      'grass': images('tiles/grass'),
+      'stone': images('tiles/stone'),
+      'decor': images('tiles/decor'),
+      'large_decor': images('tiles/large_decor'),
+      'spawners': images('tiles/spawners'),
     }
     
     self.movement = [
@@ -39,7 +42,7 @@ class Editor:
     try:
       file_path = './data/created_maps/'
       load_map = 'movement_intro_v2'
-      self.tilemap.load(file_path, load_map + '.json')
+      self.tilemap.load(file_path, load_map + '.json', autotile=True)
       
       self.map_name = load_map + '.json'
     except FileNotFoundError:
@@ -104,29 +107,25 @@ class Editor:
     ## OffGrid tiles
     if self.clicking and not self.on_grid:
         tile_content['pos'] = (tile_content['pos'][0] + self.scroll[0], tile_content['pos'][1] + self.scroll[1])
-        self.tilemap.offgrid_tiles.append(tile_content)
+        self.tilemap.add_offgrid(tile_content)
 
   def handle_ongrid_tile_placing(self):
     img_pos = self.get_img_pos()
     if self.clicking and self.on_grid:
-        self.tilemap.tilemap[str(img_pos[0]) + ';' + str(img_pos[1])] = {'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': img_pos}
+        self.tilemap.set_tile(img_pos, {'type': self.tile_list[self.tile_group], 'variant': self.tile_variant})
+        self.tilemap.autotile_around(img_pos)
 
   def handle_tile_deletion(self):
     img_on_grid_pos = (int((self.mpos[0] + self.scroll[0]) // self.tilemap.tile_size), int((self.mpos[1] + self.scroll[1]) // self.tilemap.tile_size))
     
     if self.right_clicking:
       ## OnGrid deletion
-      tile_loc = str(img_on_grid_pos[0]) + ';' + str(img_on_grid_pos[1])
-      if tile_loc in self.tilemap.tilemap:
-        del self.tilemap.tilemap[tile_loc]
+      if self.tilemap.remove_tile(img_on_grid_pos) is not None:
+        self.tilemap.autotile_around(img_on_grid_pos)
       
       ## OffGrid deletion
-      for tile in self.tilemap.offgrid_tiles:
-        img = self.assets[tile['type']][tile['variant']]
-        img_hitbox = pygame.Rect(tile['pos'][0] - self.scroll[0], tile['pos'][1] - self.scroll[1], img.get_width(), img.get_height())
-        
-        if img_hitbox.collidepoint(self.mpos):
-          self.tilemap.offgrid_tiles.remove(tile)
+      for tile in self.tilemap.offgrid_at((self.mpos[0] + self.scroll[0], self.mpos[1] + self.scroll[1])):
+        self.tilemap.remove_offgrid(tile)
 
   def handle_user_input(self):
     for event in pygame.event.get():
@@ -220,9 +219,8 @@ class Editor:
       
       current_tile_img = self.assets[self.tile_list[self.tile_group]][self.tile_variant].copy()
       
-      ## Render scale cause display is grown to be size of screen 
-      mpos = pygame.mouse.get_pos()
-      self.mpos = (mpos[0] / RENDER_SCALE, mpos[1] / RENDER_SCALE)
+      ## Display is scaled (and maybe letterboxed) onto the screen, see Presenter
+      self.mpos = self.presenter.to_source(pygame.mouse.get_pos())
       
       
       self.handle_preview_image(current_tile_img)
@@ -231,7 +229,7 @@ class Editor:
       
       self.handle_user_input()
 
-      self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), (0, 0))
+      self.presenter.present(self.display)
       pygame.display.update()
       self.clock.tick(60)
 
@@ -239,4 +237,9 @@ class Editor:
     self.display.fill((0, 0, 0))
   
 
-Editor().run()
\ No newline at end of file
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--window', type=parse_window_size, default=DEFAULT_WINDOW_SIZE, metavar='WxH', help='window size, the map is scaled by the biggest whole number that fits (default 640x480)')
+  args = parser.parse_args()
+  
+  Editor(window_size=args.window).run()
\ No newline at end of file
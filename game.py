@@ -1,16 +1,29 @@
+import os
 import sys
+import time
+import struct
+import hashlib
+import argparse
 import pygame
 import random
-import math
 
 from scripts.animations import Animation
 from scripts.enemy import Enemy
 from scripts.player import Player
-from scripts.spark import Spark
-from scripts.utils import load_image, load_images, load_sfx, load_sounds
-from scripts.tilemap import Tilemap
+from scripts.spark import SparkSystem
+from scripts.utils import NullSound, load_image, load_sfx, load_sounds
+from scripts.asset_bundle import AssetBundle
+from scripts.level import LevelLoader
+from scripts.line_of_sight import LineOfSight
+from scripts.lod import LodScheduler
 from scripts.clouds import Clouds
-from scripts.particle import Particle
+from scripts.particle import ParticleSystem
+from scripts.projectile import ProjectileSystem
+from scripts.outline import Outliner
+from scripts.profiler import FrameProfiler
+from scripts.presenter import DEFAULT_WINDOW_SIZE, Presenter, parse_window_size
+from scripts.transition import TransitionEffect
+from scripts.replay import Recording, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_DASH, INPUT_DEBUG
 
 LEVELS_ORDER = [
   '0_movement_intro',
@@ -21,20 +34,51 @@ LEVELS_ORDER = [
   '5_showoff'
 ]
 
+## Gameplay runs at a fixed TICK_RATE whatever the frame rate is, see run()
+TICK_RATE = 60
+TICK = 1 / TICK_RATE
+MAX_TICKS_PER_FRAME = 5 ## Catch up limit, past it the game slows down instead of freezing
+MAX_FPS = 120
+
 class Game:
-  def __init__(self):
-    pygame.init()
+  def __init__(self, headless = False, profile_csv = None, seed = None, level = 0, record = None, window_size = DEFAULT_WINDOW_SIZE):
+    ## Headless: no window, no audio and no frame limit, driven through step()
+    self.headless = headless
+    if headless:
+      ## A display is still needed so images can be convert()ed
+      os.environ['SDL_VIDEODRIVER'] = 'dummy'
+      pygame.display.init()
+    else:
+      pygame.init()
     pygame.display.set_caption('ninja game')
     
-    self.screen = pygame.display.set_mode((640, 480)) ## X, Y
+    self.screen = pygame.display.set_mode(window_size) ## X, Y
     self.display = pygame.Surface((320, 240), pygame.SRCALPHA)
     self.display_2 = pygame.Surface((320, 240))
     self.clock = pygame.time.Clock()
+    ## Scales display_2 onto the window, see Presenter
+    self.presenter = Presenter(self.screen, self.display_2)
+    
+    ## Level start/end and respawn wipe, frames are cached, see TransitionEffect
+    self.transition_effect = TransitionEffect('circle')
+    
+    ## Sprites drawn on display get their black outline on display_2
+    self.outliner = Outliner(self.display_2)
     
     self.movement = [
       False,  ## LEFT
       False  ## RIGHT
     ]
+    ## Jump, dash... pressed since the last update (INPUT_* flags)
+    self.input_actions = 0
+    
+    ## All gameplay randomness goes through rng so a seed and the inputs replay a session.
+    ## Purely cosmetic picks (sounds, screenshake) keep using the random module
+    self.seed = seed if seed is not None else random.randrange(1 << 63)
+    self.rng = random.Random(self.seed)
+    
+    self.record_path = record
+    self.recording = Recording(self.seed, level) if record else None
     
     self.assets = self.create_assets()
     self.sounds = self.create_sfx()
@@ -42,44 +86,51 @@ class Game:
     self.debug_mode = False
     self.print = False
     
+    ## Per phase frame timings, shown with F3 and optionally dumped to CSV
+    self.profiler = FrameProfiler()
+    if profile_csv:
+      self.profiler.start_csv(profile_csv)
+    
     self.screenshake = 0
-    self.tilemap = Tilemap(self, tile_size=16)
     self.clouds = Clouds(self.assets['clouds'], count=16)
     self.frames = 0
-    self.level = 0 
+    self.level = level
+    self.particles = ParticleSystem(self)
+    self.sparks = SparkSystem()
+    self.projectiles = ProjectileSystem(self)
+    self.line_of_sight = LineOfSight(self)
+    ## Off screen enemies update less often or sleep, see LodScheduler
+    self.lod = LodScheduler()
+    self.levels = LevelLoader(self)
     self.load_level(LEVELS_ORDER[self.level])
   
 
   def load_level(self, map_id):
-    file_path = './data/created_maps/'
-    self.tilemap.load(file_path, str(map_id) + '.json')
-    
-    ## Tree particles init
-    self.leaf_spawners = []
-    for tree in self.tilemap.extract([('large_decor', 2)], keep=True):
-      leaf_reac = pygame.Rect(tree['pos'][0] + 4, tree['pos'][1] + 4, 23, 13)
-      self.leaf_spawners.append(leaf_reac)
-    ##
-    
+    self.apply_level(self.levels.get(map_id))
+
+  def restart_level(self):
+    ## Respawn: same level from its in memory snapshot
+    self.current_level.restore()
+    self.apply_level(self.current_level)
+
+  def apply_level(self, level):
+    ## Main thread half of level loading, the parsing already happened in prepare_level
+    self.current_level = level
+    self.tilemap = level.tilemap
+    self.leaf_spawners = level.leaf_spawners
     
-    ## Enemy spawners
     self.enemies: list[Enemy] = []
-    player_spawn_coord = (0, 0)
-    for spawner in self.tilemap.extract([('spawners', 0), ('spawners', 1), ('spawners', 2)], keep=False):
-      if spawner['variant'] == 0:
-        player_spawn_coord = spawner['pos']
-      elif spawner['variant'] == 1:
-        self.enemies.append(Enemy(self, spawner['pos'], (8, 15)))
-      elif spawner['variant'] == 2:
-        self.enemies.append(Enemy(self, spawner['pos'], (8, 15), True))
-    ##
-    
-    self.player = Player(self, player_spawn_coord)
+    for pos, harmless in level.enemy_spawns:
+      self.enemies.append(Enemy(self, pos, (8, 15), harmless))
+    
+    self.player = Player(self, level.player_spawn)
     self.scroll = self.create_camera()
+    self.prev_scroll = list(self.scroll)
     
-    self.particles: list[Particle] = []
-    self.projectiles = []
-    self.sparks = []
+    self.particles.clear()
+    self.projectiles.clear()
+    self.sparks.clear()
+    self.lod.reset()
     self.transition = -30
 
   def run(self):
@@ -89,123 +140,161 @@ class Game:
     
     self.sounds['ambience'].play(-1)
     
+    ## Fixed timestep: real time piles up in the accumulator and is spent in
+    ## TICK sized updates, so a slow frame means more updates next frame rather
+    ## than a slower game. Rendering draws alpha of the way into the next tick
+    accumulator = 0.0
+    last = time.perf_counter()
     while True:
-      self.screenshake = max(0, self.screenshake - 1)
-      
-      if self.transition < 0:
-        self.transition += 1
-      
-      if not len(self.enemies):
-        self.transition += 1
-        if self.transition > 60:
-          self.level = (self.level + 1) % len(LEVELS_ORDER)
-          self.load_level(LEVELS_ORDER[self.level])
-      
-      if self.player.dead:
-        self.player.dead += 1
-        if self.player.dead >= 30:
-          self.transition = min(30, self.transition + 1)
-        
-        if self.player.dead > 60:
-          self.load_level(LEVELS_ORDER[self.level])
-      
-      
-      self.frames = (self.frames + 1) % 61
-      self.set_background()
-      self.set_camera_coord()
-      render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
-      
-      self.clouds.update()
-      self.clouds.render(self.display_2, offset=render_scroll)
-      
-      self.tilemap.render(self.display, offset = render_scroll)
-      
-      for enemy in self.enemies:
-        kill = enemy.update(self.tilemap, (0,0))
-        enemy.render(self.display, offset=render_scroll)
-        if kill:
-          self.enemies.remove(enemy)
-      
-      
-      if not self.player.dead:
-        self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
-        self.player.render(self.display, offset = render_scroll)
-      
-      
-      ## TODO: Refactor projectile handler
-      ## TODO: Create Projectile class
-      for projectile in self.projectiles.copy():
-        projectile['location'][0] = projectile['location'][0] + projectile['velocity']
-        projectile['timer'] = max(0, projectile['timer'] - 1)
-        img = self.assets['projectile']
-        self.display.blit(img, (projectile['location'][0] - img.get_width() / 2 - render_scroll[0], projectile['location'][1] - img.get_height() / 2 - render_scroll[1]))
-        
-        if self.tilemap.is_solid_block(projectile['location']):
-          self.projectiles.remove(projectile)
-          for i in range(4):
-            pos = projectile['location']
-            angle = random.random() - 0.5 + (math.pi if projectile['velocity'] > 0 else 0)
-            speed = random.random() + 2
-            
-            self.sparks.append(Spark(pos, angle, speed))
-        elif projectile['timer'] < 0:
-          self.projectiles.remove(projectile)
-        elif not self.player.dead and not self.player.dash_info['active_frames']:
-          if self.player.rect().collidepoint(projectile['location']):
-            self.projectiles.remove(projectile)
-            self.player.death()
-      ####
-      
-      
-      display_mask = pygame.mask.from_surface(self.display)
-      display_sillhouette = display_mask.to_surface(setcolor = (0, 0, 0, 255), unsetcolor = (0, 0, 0, 0))
-      
-      for offset in [(-1, 0), (1, 0), (0, 1), (0, -1)]:
-        self.display_2.blit(display_sillhouette, offset)
-      
-      for spark in self.sparks.copy():
-        kill = spark.update()
-        spark.render(self.display, render_scroll)
-        if kill:
-          self.sparks.remove(spark)
-      
-      ## TODO: Refactor particles handler
-      ## Particles
-      for rect in self.leaf_spawners:
-        if random.random() * 49999 < rect.width * rect.height:
-          pos_x = rect.x + random.random() * rect.width
-          pos_y = rect.y + random.random() * rect.height
-          velocity = [ -0.1, 0.3 ]
-          self.particles.append(Particle(self, 'leaf', (pos_x, pos_y), velocity, frame=random.randint(0, 20)))
-      
-      for particles in self.particles.copy():
-        kill = particles.update()
-        particles.render(self.display, offset=render_scroll)
-        
-        if particles.p_type == 'leaf':
-          ## Moving particle left to right
-          particles.pos[0] += math.sin(particles.animation.frame * 0.035) * 0.3
-        
-        if kill:
-          self.particles.remove(particles)
-      ####
+      now = time.perf_counter()
+      accumulator += now - last
+      last = now
       
+      self.profiler.begin_frame()
       self.handle_user_input()
+      self.profiler.mark('input')
       
-      if self.transition:
-        transition_surf = pygame.Surface(self.display.get_size())
-        pygame.draw.circle(transition_surf, (255, 255 , 255), (self.display.get_width() // 2, self.display.get_height() // 2), (30 - abs(self.transition)) * 8)
-        transition_surf.set_colorkey((255, 255, 255))
-        self.display.blit(transition_surf, (0, 0))
+      ticks = 0
+      while accumulator >= TICK and ticks < MAX_TICKS_PER_FRAME:
+        self.update()
+        accumulator -= TICK
+        ticks += 1
+      if ticks == MAX_TICKS_PER_FRAME:
+        ## Too far behind (a stall, window drag...), drop the backlog
+        accumulator = min(accumulator, TICK)
       
-      if self.debug_mode:
-        text = self.my_font.render('Debug mode', False, (0, 0, 0))
-        self.display_2.blit(text, (10, self.display_2.get_height() - 10))
-      self.display_2.blit(self.display, (0, 0))
-      screenshake_offset = (random.random() * self.screenshake - self.screenshake / 2, random.random() * self.screenshake - self.screenshake / 2)
-      self.screen.blit(pygame.transform.scale(self.display_2, self.screen.get_size()), screenshake_offset)
-      pygame.display.update()
-      self.clock.tick(60)
+      self.render(alpha = accumulator / TICK)
+      self.present()
+      self.profiler.mark('present')
+      self.profiler.end_frame()
+      self.clock.tick(MAX_FPS)
+  
+  def step(self, frames = 1, render = False, inputs = None):
+    ## Advances the simulation without touching the window, clock or audio.
+    ## inputs: one INPUT_* byte per frame (a replay), replaces the frame count
+    if inputs is None:
+      inputs = [None] * frames
+    
+    for frame_input in inputs:
+      self.profiler.begin_frame()
+      self.update(frame_input)
+      if render:
+        self.render()
+      self.profiler.end_frame()
+  
+  def update(self, frame_input = None):
+    if frame_input is None:
+      frame_input = self.collect_input()
+    if self.recording:
+      self.recording.record(frame_input)
+    self.apply_input(frame_input)
+    
+    self.screenshake = max(0, self.screenshake - 1)
+    
+    if self.transition < 0:
+      self.transition += 1
+    
+    if not len(self.enemies):
+      ## Next level gets parsed in the background while the transition plays
+      next_level = (self.level + 1) % len(LEVELS_ORDER)
+      self.levels.preload(LEVELS_ORDER[next_level])
+      self.transition += 1
+      if self.transition > 60:
+        self.level = next_level
+        self.load_level(LEVELS_ORDER[self.level])
+    
+    if self.player.dead:
+      self.player.dead += 1
+      if self.player.dead >= 30:
+        self.transition = min(30, self.transition + 1)
+      
+      if self.player.dead > 60:
+        self.restart_level()
+    
+    
+    self.frames = (self.frames + 1) % 61
+    self.set_camera_coord()
+    self.profiler.mark('level')
+    
+    self.clouds.update()
+    self.profiler.mark('clouds')
+    
+    scheduled = self.lod.schedule(self.enemies, self.scroll, self.display.get_size())
+    ## Who can see the player, traced for every enemy at once
+    self.line_of_sight.update(scheduled, self.player)
+    for enemy in scheduled:
+      kill = enemy.update(self.tilemap, (0,0))
+      if kill:
+        self.enemies.remove(enemy)
+    self.profiler.mark('enemies')
+    
+    if not self.player.dead:
+      self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
+    self.profiler.mark('player')
+    
+    self.projectiles.update()
+    self.profiler.mark('projectiles')
+    
+    self.sparks.update()
+    self.profiler.mark('sparks')
+    
+    ## Particles
+    for rect in self.leaf_spawners:
+      if self.rng.random() * 49999 < rect.width * rect.height:
+        pos_x = rect.x + self.rng.random() * rect.width
+        pos_y = rect.y + self.rng.random() * rect.height
+        velocity = [ -0.1, 0.3 ]
+        self.particles.spawn('leaf', (pos_x, pos_y), velocity, frame=self.rng.randint(0, 20))
+    
+    self.particles.update()
+    self.profiler.mark('particles')
+    ####
+  
+  def render(self, alpha = 1.0):
+    ## alpha: how far into the next tick this frame is, positions are drawn
+    ## that far between the previous tick and the current one
+    self.set_background()
+    render_scroll = (int(self.prev_scroll[0] + (self.scroll[0] - self.prev_scroll[0]) * alpha), int(self.prev_scroll[1] + (self.scroll[1] - self.prev_scroll[1]) * alpha))
+    self.profiler.mark('level')
+    
+    self.clouds.render(self.display_2, offset=render_scroll, alpha=alpha)
+    self.profiler.mark('clouds')
+    
+    self.tilemap.render(self.display, offset = render_scroll, outline = self.outliner)
+    self.profiler.mark('tilemap')
+    
+    for enemy in self.lod.visible(self.enemies, render_scroll, self.display.get_size()):
+      enemy.render(self.display, offset=render_scroll, outline = self.outliner, alpha = alpha)
+    self.profiler.mark('enemies')
+    
+    if not self.player.dead:
+      self.player.render(self.display, offset = render_scroll, outline = self.outliner, alpha = alpha)
+    self.profiler.mark('player')
+    
+    self.projectiles.render(self.display, offset = render_scroll, outline = self.outliner, alpha = alpha)
+    self.profiler.mark('projectiles')
+    
+    self.sparks.render(self.display, render_scroll, alpha = alpha)
+    self.profiler.mark('sparks')
+    
+    self.particles.render(self.display, offset=render_scroll, alpha = alpha)
+    self.profiler.mark('particles')
+    
+    self.transition_effect.render(self.display, self.transition)
+    self.profiler.mark('transition')
+    
+    if self.debug_mode:
+      text = self.my_font.render('Debug mode', False, (0, 0, 0))
+      self.display_2.blit(text, (10, self.display_2.get_height() - 10))
+      self.profiler.render(self.display, self.my_font, (4, 4))
+    self.display_2.blit(self.display, (0, 0))
+    self.profiler.mark('debug')
+  
+  def present(self):
+    ## In display pixels, half of the old screen pixel offsets at the fixed 2x window
+    screenshake_offset = (random.random() * self.screenshake / 2 - self.screenshake / 4, random.random() * self.screenshake / 2 - self.screenshake / 4)
+    self.presenter.present(self.display_2, screenshake_offset)
+    pygame.display.update()
   
   def set_background(self):
     self.display.fill((0, 0, 0, 0))
@@ -218,6 +307,8 @@ class Game:
     
     player_rect = self.player.rect()
     display = self.display
+    self.prev_scroll[0] = self.scroll[0]
+    self.prev_scroll[1] = self.scroll[1]
     
     # [camera_x_coord +] = camera coordinates will be the same value as before (camera_x_coord)
     # [player_rect.centerx - half_x_screen] = going into the direction of the player (up half screen)
@@ -238,27 +329,24 @@ class Game:
     #   print('camera: ('+ str(self.scroll[0]) + ',' + str(self.scroll[1]) + ')')
   
   def handle_user_input(self):
+    ## Only gathers input, it is applied at the start of the next update
     for event in pygame.event.get():
       if event.type == pygame.QUIT:
-        pygame.quit()
-        sys.exit()
+        self.quit()
       
       if event.type == pygame.KEYDOWN:
         if event.key == pygame.K_F3:
-          pygame.font.init()
-          self.my_font = pygame.font.SysFont('Arial', 8)
-          self.debug_mode = not self.debug_mode
+          self.input_actions |= INPUT_DEBUG
         if event.key == pygame.K_F10:
           self.print = True
         elif event.key == pygame.K_w:
-          if self.player.jump():
-            self.sounds['jump'].play()
+          self.input_actions |= INPUT_JUMP
         elif event.key == pygame.K_a:
             self.movement[0]= True
         elif event.key == pygame.K_d:
           self.movement[1]= True
         elif event.key == pygame.K_LSHIFT:
-          self.player.dash()
+          self.input_actions |= INPUT_DASH
         
       if event.type == pygame.KEYUP:
         if event.key == pygame.K_a:
@@ -268,6 +356,55 @@ class Game:
         if event.key == pygame.K_F10:
           self.print = False
 
+  def collect_input(self):
+    frame_input = self.input_actions
+    if self.movement[0]:
+      frame_input |= INPUT_LEFT
+    if self.movement[1]:
+      frame_input |= INPUT_RIGHT
+    self.input_actions = 0
+    return frame_input
+  
+  def apply_input(self, frame_input):
+    self.movement[0] = bool(frame_input & INPUT_LEFT)
+    self.movement[1] = bool(frame_input & INPUT_RIGHT)
+    
+    if frame_input & INPUT_DEBUG:
+      pygame.font.init()
+      self.my_font = pygame.font.SysFont('Arial', 8)
+      self.debug_mode = not self.debug_mode
+      self.profiler.set_enabled(self.debug_mode or self.profiler.csv_writer is not None)
+    if frame_input & INPUT_JUMP:
+      if self.player.jump():
+        self.sounds['jump'].play()
+    if frame_input & INPUT_DASH:
+      self.player.dash()
+  
+  def state_hash(self):
+    ## Digest of the gameplay state, two runs of the same replay must end on the same value
+    state = hashlib.sha256()
+    state.update(struct.pack('<HH', self.level, len(self.enemies)))
+    
+    player = self.player
+    state.update(struct.pack('<ddddiiiddd', player.pos[0], player.pos[1], player.velocity[0], player.velocity[1], player.dead, player.air_time, player.jumps, player.dash_info['direction'], player.dash_info['active_frames'], player.dash_info['cooldown_frames']))
+    for enemy in self.enemies:
+      state.update(struct.pack('<ddddi?i', enemy.pos[0], enemy.pos[1], enemy.velocity[0], enemy.velocity[1], enemy.walking, enemy.flip, enemy.shot_cooldown))
+    
+    projectiles = self.projectiles
+    state.update(projectiles.x[:projectiles.count].tobytes())
+    state.update(projectiles.y[:projectiles.count].tobytes())
+    state.update(struct.pack('<II', len(self.sparks), len(self.particles)))
+    state.update(repr(self.rng.getstate()).encode())
+    return state.digest()
+  
+  def quit(self):
+    self.profiler.stop_csv()
+    if self.recording:
+      self.recording.save(self.record_path, self.state_hash())
+      print('Recorded ' + str(len(self.recording.inputs)) + ' frames into ' + self.record_path)
+    pygame.quit()
+    sys.exit()
+  
   def create_camera(self):
     # REMEMBER: when setting camera coordinate, 
     # you should aim for the top left corner of the screen
@@ -290,38 +427,54 @@ class Game:
     return scroll
 
   def create_assets(self):
+    ## Image folders come from the prebuilt atlas, see AssetBundle
+    images = AssetBundle.load().images
+    
     return {
       'player': load_image('entities/player.png'),
-      'decor': load_images('tiles/decor'),
-      'large_decor': load_images('tiles/large_decor'),
-      'grass': load_images('tiles/grass'),
-      'stone': load_images('tiles/stone'),
+      'decor': images('tiles/decor'),
+      'large_decor': images('tiles/large_decor'),
+      'spawners': images('tiles/spawners'),
+      'grass': images('tiles/grass'),
+      'stone': images('tiles/stone'),
       'background': load_image('background.png'),
-      'clouds': load_images('clouds'),
+      'clouds': images('clouds'),
       'gun': load_image('gun.png'),
+      'gun_flipped': pygame.transform.flip(load_image('gun.png'), True, False),
       'projectile': load_image('projectile.png'),
       'harmless_enemy': {
-        'idle': Animation(load_images('entities/harmless_enemy/idle'), img_dur=6),
-        'run': Animation(load_images('entities/harmless_enemy/run'), img_dur=4),
+        'idle': Animation(images('entities/harmless_enemy/idle'), img_dur=6),
+        'run': Animation(images('entities/harmless_enemy/run'), img_dur=4),
       },
       'enemy': {
-        'idle': Animation(load_images('entities/enemy/idle'), img_dur=6),
-        'run': Animation(load_images('entities/enemy/run'), img_dur=4),
+        'idle': Animation(images('entities/enemy/idle'), img_dur=6),
+        'run': Animation(images('entities/enemy/run'), img_dur=4),
       },
       'player': {
-        'idle': Animation(load_images('entities/player/idle'), img_dur = 6, loop = True),
-        'run': Animation(load_images('entities/player/run'), img_dur = 4, loop = True),
-        'jump': Animation(load_images('entities/player/jump')),
-        'slide': Animation(load_images('entities/player/slide')),
-        'wall_slide': Animation(load_images('entities/player/wall_slide')),
+        'idle': Animation(images('entities/player/idle'), img_dur = 6, loop = True),
+        'run': Animation(images('entities/player/run'), img_dur = 4, loop = True),
+        'jump': Animation(images('entities/player/jump')),
+        'slide': Animation(images('entities/player/slide')),
+        'wall_slide': Animation(images('entities/player/wall_slide')),
       },
       'particles': {
-        'leaf': Animation(load_images('particles/leaf'), img_dur=20, loop=False),
-        'dash': Animation(load_images('particles/particle'), img_dur=6, loop=False)
+        'leaf': Animation(images('particles/leaf'), img_dur=20, loop=False),
+        'dash': Animation(images('particles/particle'), img_dur=6, loop=False)
       }
     }
 
   def create_sfx(self):
+    if self.headless:
+      silent = NullSound()
+      return {
+        'jump': silent,
+        'dash': silent,
+        'hurts': [silent],
+        'hits': [silent],
+        'shoot': silent,
+        'ambience': silent,
+      }
+    
     return {
       'jump': load_sfx('jump.wav', 0.1),
       'dash': load_sfx('dash.wav', 0.1),
@@ -331,4 +484,32 @@ class Game:
       'ambience': load_sfx('ambience.wav', 0.2),
     }
 
-Game().run()
\ No newline at end of file
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--headless', type=int, metavar='FRAMES', help='simulate FRAMES frames without a window and exit')
+  parser.add_argument('--profile-csv', metavar='PATH', help='write per phase frame timings to PATH')
+  parser.add_argument('--record', metavar='PATH', help='record the inputs of this session into a replay file')
+  parser.add_argument('--replay', metavar='PATH', help='re-run a replay file headless at full speed and check its final state')
+  parser.add_argument('--window', type=parse_window_size, default=DEFAULT_WINDOW_SIZE, metavar='WxH', help='window size, the game is scaled by the biggest whole number that fits (default 640x480)')
+  args = parser.parse_args()
+  
+  if args.replay:
+    recording = Recording.load(args.replay)
+    game = Game(headless=True, profile_csv=args.profile_csv, seed=recording.seed, level=recording.level)
+    start = time.perf_counter()
+    game.step(inputs=recording.inputs)
+    elapsed = time.perf_counter() - start
+    game.profiler.stop_csv()
+    
+    matches = game.state_hash() == recording.state_hash
+    print(str(len(recording.inputs)) + ' frames replayed in ' + str(round(elapsed, 3)) + 's, final state ' + ('matches' if matches else 'DOES NOT match'))
+    sys.exit(0 if matches else 1)
+  elif args.headless is not None:
+    game = Game(headless=True, profile_csv=args.profile_csv)
+    start = time.perf_counter()
+    game.step(args.headless)
+    elapsed = time.perf_counter() - start
+    game.profiler.stop_csv()
+    print(str(args.headless) + ' frames in ' + str(round(elapsed, 3)) + 's (' + str(round(args.headless / max(elapsed, 1e-9))) + ' fps)')
+  else:
+    Game(profile_csv=args.profile_csv, record=args.record, window_size=args.window).run()
@@ -1,13 +1,22 @@
+import pygame
+
+
 class Animation:
-  def __init__(self, images, img_dur = 5, loop = True):
+  __slots__ = ('images', 'flipped_images', 'loop', 'img_duration', 'done', 'frame')
+  
+  def __init__(self, images, img_dur = 5, loop = True, flipped_images = None):
     self.images = images
+    ## Left facing frames, built once and shared by every copy
+    if flipped_images is None:
+      flipped_images = [pygame.transform.flip(img, True, False) for img in images]
+    self.flipped_images = flipped_images
     self.loop = loop
     self.img_duration = img_dur
     self.done = False
     self.frame = 0
   
   def copy(self):
-    return Animation(self.images, self.img_duration, self.loop)
+    return Animation(self.images, self.img_duration, self.loop, self.flipped_images)
     
   def update(self):
     if self.loop:
@@ -17,5 +26,7 @@ class Animation:
       if self.frame >= self.img_duration * len(self.images) - 1:
         self.done = True
     
-  def img(self):
+  def img(self, flip = False):
+    if flip:
+      return self.flipped_images[int(self.frame / self.img_duration)]
     return self.images[int(self.frame / self.img_duration)]
\ No newline at end of file
@@ -0,0 +1,114 @@
+import os
+import json
+
+import pygame
+
+from scripts.utils import BASE_IMG_PATH, load_images
+
+BUNDLE_PATH = 'data/bundle/'
+BUNDLE_VERSION = 1
+ATLAS_WIDTH = 512
+
+# Every image folder under data/images (the ones load_images reads) packed
+# into one atlas image plus an index of where each frame sits.
+# The index keeps the size and mtime of every source file, the bundle
+# is rebuilt only when one of those changes.
+
+def image_folders():
+  folders = {}
+  for root, dirs, files in os.walk(BASE_IMG_PATH):
+    images = sorted(name for name in files if name.endswith('.png'))
+    folder = os.path.relpath(root, BASE_IMG_PATH).replace(os.sep, '/')
+    ## Only folders load_images() can read: images and nothing else
+    if images and not dirs and folder != '.':
+      folders[folder] = images
+  return folders
+
+def fingerprint(folders):
+  entries = []
+  for folder in sorted(folders):
+    for name in folders[folder]:
+      stat = os.stat(BASE_IMG_PATH + folder + '/' + name)
+      entries.append([folder + '/' + name, stat.st_size, stat.st_mtime_ns])
+  return entries
+
+def pack(sizes, width = ATLAS_WIDTH):
+  ## Shelf packing, tallest images first. Returns one (x, y) per size and the atlas height
+  order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+  width = max([width] + [size[0] for size in sizes])
+  positions = [None] * len(sizes)
+
+  x = y = shelf_height = 0
+  for i in order:
+    w, h = sizes[i]
+    if x + w > width:
+      x = 0
+      y += shelf_height
+      shelf_height = 0
+    positions[i] = (x, y)
+    x += w
+    shelf_height = max(shelf_height, h)
+
+  return positions, width, y + shelf_height
+
+class AssetBundle:
+  def __init__(self, atlas, groups):
+    self.atlas = atlas
+    self.groups = groups
+
+  def images(self, path):
+    if path not in self.groups:
+      return load_images(path)
+    return [self.atlas.subsurface(rect) for rect in self.groups[path]]
+
+  @staticmethod
+  def build(folders, source_fingerprint):
+    images = []
+    keys = []
+    for folder in sorted(folders):
+      for name in folders[folder]:
+        ## Same pixels load_image() would produce
+        images.append(pygame.image.load(BASE_IMG_PATH + folder + '/' + name).convert())
+        keys.append(folder)
+
+    positions, width, height = pack([img.get_size() for img in images])
+    atlas = pygame.Surface((width, max(1, height)))
+    atlas.fill((0, 0, 0))
+
+    groups = {}
+    for img, folder, pos in zip(images, keys, positions):
+      atlas.blit(img, pos)
+      groups.setdefault(folder, []).append([pos[0], pos[1], img.get_width(), img.get_height()])
+
+    index = {'version': BUNDLE_VERSION, 'fingerprint': source_fingerprint, 'groups': groups}
+    try:
+      os.makedirs(BUNDLE_PATH, exist_ok=True)
+      pygame.image.save(atlas, BUNDLE_PATH + 'atlas.png')
+      file_connection = open(BUNDLE_PATH + 'index.json', 'w') # Writing
+      json.dump(index, file_connection)
+      file_connection.close()
+    except OSError as error:
+      ## Read only install, keep using the bundle built in memory
+      print('Could not save asset bundle: ' + str(error))
+
+    atlas.set_colorkey((0, 0, 0))
+    return AssetBundle(atlas, groups)
+
+  @staticmethod
+  def load():
+    folders = image_folders()
+    source_fingerprint = fingerprint(folders)
+
+    try:
+      file_connection = open(BUNDLE_PATH + 'index.json', 'r') # Reading
+      index = json.load(file_connection)
+      file_connection.close()
+    except (OSError, ValueError):
+      index = None
+
+    if not index or index.get('version') != BUNDLE_VERSION or index.get('fingerprint') != source_fingerprint or not os.path.exists(BUNDLE_PATH + 'atlas.png'):
+      return AssetBundle.build(folders, source_fingerprint)
+
+    atlas = pygame.image.load(BUNDLE_PATH + 'atlas.png').convert()
+    atlas.set_colorkey((0, 0, 0))
+    return AssetBundle(atlas, index['groups'])
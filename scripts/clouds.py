@@ -1,6 +1,8 @@
 import random
 
 class Cloud:
+  __slots__ = ('pos', 'img', 'speed', 'depth')
+  
   def __init__(self, pos, img, speed, depth):
     self.pos = list(pos) ## Duplicated "pos" value
     self.img = img
@@ -10,12 +12,15 @@ class Cloud:
   def update(self):
     self.pos[0] += self.speed
     
-  def render(self, surf, offset = (0, 0)):
-    render_pos = (self.pos[0] - offset[0] * self.depth, self.pos[1] - offset[1] * self.depth)
+  def render(self, surf, offset = (0, 0), alpha = 1.0):
+    ## Clouds move `speed` per tick, so the previous position is one step back
+    render_pos = (self.pos[0] - self.speed * (1 - alpha) - offset[0] * self.depth, self.pos[1] - offset[1] * self.depth)
     
     surf.blit(self.img, (render_pos[0] % (surf.get_width() + self.img.get_width()) - self.img.get_width(), render_pos[1] % (surf.get_height() + self.img.get_height()) - self.img.get_height()))
 
 class Clouds:
+  __slots__ = ('clouds',)
+  
   def __init__(self, clouds_image, count = 16):
     self.clouds = []
     
@@ -31,6 +36,6 @@ class Clouds:
     for cloud in self.clouds:
       cloud.update()
       
-  def render(self, surf, offset = (0, 0)):
+  def render(self, surf, offset = (0, 0), alpha = 1.0):
     for cloud in self.clouds:
-      cloud.render(surf, offset=offset)
\ No newline at end of file
+      cloud.render(surf, offset=offset, alpha=alpha)
\ No newline at end of file
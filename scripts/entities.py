@@ -4,10 +4,15 @@ import pygame
 from scripts.tilemap import Tilemap
 
 class PhysicsEntity:
+  ## Fixed attributes, no per instance __dict__ (subclasses add their own __slots__)
+  __slots__ = ('game', 'type', 'pos', 'size', 'velocity', 'colisions', 'action', 'flip', 'animation', 'last_movement', 'anim_offset', 'hitbox', 'prev_pos')
+  
   def __init__(self, game, e_type, pos, size):
     self.game = game
     self.type = e_type
     self.pos = list(pos)
+    ## Position before the last update, render() draws in between the two
+    self.prev_pos = list(pos)
     self.size = size
     self.velocity = [0, 0]
     self.colisions = {'up': False, 'down': False, 'left': False, 'right': False}
@@ -23,45 +28,62 @@ class PhysicsEntity:
     # of the original coordenates
     self.anim_offset = (-3, -3)
     
+    ## Reused by rect(), one Rect per entity for its whole life
+    self.hitbox = pygame.Rect(0, 0, 0, 0)
+    
   def rect(self):
-    return pygame.Rect(self.pos[0], self.pos[1], self.size[0], self.size[1])
+    ## Updated in place: read it or copy it, don't keep it across frames
+    self.hitbox.update(self.pos[0], self.pos[1], self.size[0], self.size[1])
+    return self.hitbox
+  
+  def render_pos(self, alpha = 1.0):
+    ## Where to draw: alpha of the way from the previous tick's position to the current one
+    prev_pos = self.prev_pos
+    return (prev_pos[0] + (self.pos[0] - prev_pos[0]) * alpha, prev_pos[1] + (self.pos[1] - prev_pos[1]) * alpha)
   
   def update(self, tilemap: Tilemap, movement = (0, 0), debug=False):
-    self.colisions = {'up': False, 'down': False, 'left': False, 'right': False}
+    self.prev_pos[0] = self.pos[0]
+    self.prev_pos[1] = self.pos[1]
+    colisions = self.colisions
+    colisions['up'] = colisions['down'] = colisions['left'] = colisions['right'] = False
     entity_movement = (movement[0] + self.velocity[0], movement[1] + self.velocity[1])
     
     last_pos = list(self.pos)
     
+    ## Swept collision against the tilemap's solid grid, one query per axis.
+    ## The box slides from where it is to where the velocity takes it and stops
+    ## at the first solid tile on the way, however far that move is.
+    ## Positions truncate to whole pixels like pygame.Rect does
+    width, height = self.size
+    
     ## HORIZONTAL COLLISION
+    left, top = int(self.pos[0]), int(self.pos[1])
     self.pos[0] = self.pos[0] + entity_movement[0]
-    entity_collision = self.rect()
-    if debug: print('Collision(X): ' + str(entity_collision.x))
-    for tile in tilemap.physics_rect_around(self.pos):
-      if entity_collision.colliderect(tile):
-        if entity_movement[0] > 0: # Going right
-          entity_collision.right = tile.left
-          self.colisions['right'] = True
-        elif entity_movement[0] < 0: # Going left
-          entity_collision.left = tile.right
-          self.colisions['left'] = True
-        self.pos[0] = entity_collision.x
-        
-        if debug:
-          print('Detected horizontal colision to tile: ' + str(tilemap.tilemap[str(tile.left // tilemap.tile_size) + ';' + str(tile.top // tilemap.tile_size)]))
-          print('Moving player x pos to ' + str(entity_collision.x))
+    if debug: print('Collision(X): ' + str(int(self.pos[0])))
+    hit = tilemap.sweep_x(left, top, width, height, int(self.pos[0]))
+    if hit is not None:
+      if entity_movement[0] > 0: # Going right
+        self.pos[0] = hit * tilemap.tile_size - width
+        self.colisions['right'] = True
+      else: # Going left
+        self.pos[0] = (hit + 1) * tilemap.tile_size
+        self.colisions['left'] = True
+      
+      if debug:
+        print('Detected horizontal colision to tile: ' + str(tilemap.tilemap.get(hit, top // tilemap.tile_size)))
+        print('Moving player x pos to ' + str(self.pos[0]))
     
     ## VERTICAL COLLISION
+    left = int(self.pos[0])
     self.pos[1] = self.pos[1] + entity_movement[1]
-    entity_collision = self.rect()
-    for tile in tilemap.physics_rect_around(self.pos):
-      if entity_collision.colliderect(tile):
-        if entity_movement[1] > 0: # Going down
-          entity_collision.bottom = tile.top
-          self.colisions['down'] = True
-        if entity_movement[1] < 0: # Going up
-          entity_collision.top = tile.bottom
-          self.colisions['up'] = True
-        self.pos[1] = entity_collision.y
+    hit = tilemap.sweep_y(left, top, width, height, int(self.pos[1]))
+    if hit is not None:
+      if entity_movement[1] > 0: # Going down
+        self.pos[1] = hit * tilemap.tile_size - height
+        self.colisions['down'] = True
+      else: # Going up
+        self.pos[1] = (hit + 1) * tilemap.tile_size
+        self.colisions['up'] = True
     
     if movement[0] > 0:
       self.flip = False
@@ -85,8 +107,13 @@ class PhysicsEntity:
       self.action = action
       self.animation = self.game.assets[self.type][self.action].copy()
     
-  def render(self, surf, offset = (0, 0)):
-    surf.blit(pygame.transform.flip(self.animation.img(), self.flip, False), (self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]))
+  def render(self, surf, offset = (0, 0), outline = None, alpha = 1.0):
+    x, y = self.render_pos(alpha)
+    pos = (x - offset[0] + self.anim_offset[0], y - offset[1] + self.anim_offset[1])
+    img = self.animation.img(self.flip)
+    surf.blit(img, pos)
+    if outline:
+      outline.blit(img, pos)
   
   def print_position(self, last_position, entity_movement):
     e_rect = self.rect()
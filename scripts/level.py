@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from scripts.map_format import level_file_name
+from scripts.tilemap import Tilemap
+
+LEVELS_PATH = './data/created_maps/'
+LEVEL_CACHE_SIZE = 4
+
+class PreparedLevel:
+  # Everything a level needs that can be built away from the main thread:
+  # the parsed tilemap with spawners already extracted, plus where to spawn things.
+  def __init__(self, map_id, tilemap, leaf_spawners, player_spawn, enemy_spawns):
+    self.map_id = map_id
+    self.tilemap = tilemap
+    self.leaf_spawners = leaf_spawners
+    self.player_spawn = player_spawn
+    self.enemy_spawns = enemy_spawns ## (pos, harmless)
+    self.snapshot = tilemap.snapshot()
+
+  def restore(self):
+    ## Back to the state right after preparing, without touching the disk.
+    ## Player and enemies are rebuilt from the spawn points by Game.apply_level
+    self.tilemap.restore(self.snapshot)
+
+def prepare_level(game, map_id, path = LEVELS_PATH):
+  tilemap = Tilemap(game, tile_size=16)
+  tilemap.load(path, level_file_name(path, map_id))
+  return prepare_tilemap(map_id, tilemap)
+
+def prepare_tilemap(map_id, tilemap):
+  ## Tree particles init
+  leaf_spawners = []
+  for tree in tilemap.extract([('large_decor', 2)], keep=True):
+    leaf_reac = pygame.Rect(tree['pos'][0] + 4, tree['pos'][1] + 4, 23, 13)
+    leaf_spawners.append(leaf_reac)
+  ##
+
+  ## Enemy spawners
+  enemy_spawns = []
+  player_spawn = (0, 0)
+  for spawner in tilemap.extract([('spawners', 0), ('spawners', 1), ('spawners', 2)], keep=False):
+    if spawner['variant'] == 0:
+      player_spawn = spawner['pos']
+    elif spawner['variant'] == 1:
+      enemy_spawns.append((spawner['pos'], False))
+    elif spawner['variant'] == 2:
+      enemy_spawns.append((spawner['pos'], True))
+  ##
+
+  return PreparedLevel(map_id, tilemap, leaf_spawners, player_spawn, enemy_spawns)
+
+class LevelLoader:
+  # Parses levels on a worker thread, so the next level can be prepared
+  # while the transition plays and only has to be swapped in at the end.
+  # The last few prepared levels are kept (least recently used goes first),
+  # so respawning or replaying a level never parses its file again.
+
+  def __init__(self, game, path = LEVELS_PATH):
+    self.game = game
+    self.path = path
+    self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='level-loader')
+    self.pending = {}
+    self.cache = OrderedDict()
+    self.cache_size = LEVEL_CACHE_SIZE
+
+  def preload(self, map_id):
+    if map_id not in self.pending and map_id not in self.cache:
+      self.pending[map_id] = self.executor.submit(prepare_level, self.game, map_id, self.path)
+
+  def get(self, map_id):
+    level = self.cache.get(map_id)
+    if level is not None:
+      self.cache.move_to_end(map_id)
+      level.restore()
+      return level
+    
+    ## Waits for a preload in flight, or prepares the level right here
+    future = self.pending.pop(map_id, None)
+    if future is not None:
+      level = future.result()
+    else:
+      level = prepare_level(self.game, map_id, self.path)
+    
+    self.cache[map_id] = level
+    if len(self.cache) > self.cache_size:
+      self.cache.popitem(last=False)
+    return level
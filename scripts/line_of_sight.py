@@ -0,0 +1,73 @@
+LINE_OF_SIGHT_CACHE_SIZE = 4096
+
+def line_clear(solid, x0, y0, x1, y1):
+  ## Walks the grid cells a line from the centre of tile (x0, y0) to the centre
+  ## of tile (x1, y1) passes through (integer DDA). The end tiles themselves
+  ## are not checked, only what lies between them
+  if y0 == y1:
+    if abs(x1 - x0) < 2:
+      return True
+    step = 1 if x1 > x0 else -1
+    return solid.first_in_row(y0, x0 + step, x1 - step) is None
+
+  nx, ny = abs(x1 - x0), abs(y1 - y0)
+  step_x = 1 if x1 > x0 else -1
+  step_y = 1 if y1 > y0 else -1
+  x, y = x0, y0
+  ix = iy = 0
+  while ix < nx or iy < ny:
+    ## Which cell border the line crosses first, compared without division
+    decision = (1 + 2 * ix) * ny - (1 + 2 * iy) * nx
+    if decision == 0:
+      ## Exactly through a corner, blocked only if both cells beside it are solid
+      if solid.get(x + step_x, y) and solid.get(x, y + step_y):
+        return False
+      x += step_x
+      y += step_y
+      ix += 1
+      iy += 1
+    elif decision < 0:
+      x += step_x
+      ix += 1
+    else:
+      y += step_y
+      iy += 1
+    if (x != x1 or y != y1) and solid.get(x, y):
+      return False
+  return True
+
+class LineOfSight:
+  # Which enemies can see the player, worked out once per frame for all of
+  # them before they update. Results are cached per (enemy tile, player tile)
+  # pair, so nothing is traced again until one of them moves to another tile
+  # or the tilemap changes.
+
+  def __init__(self, game):
+    self.game = game
+    self.cache = {}
+    self.tilemap = None
+    self.revision = None
+
+  def update(self, enemies, player, max_distance = (100, 16)):
+    tilemap = self.game.tilemap
+    if tilemap is not self.tilemap or tilemap.revision != self.revision or len(self.cache) > LINE_OF_SIGHT_CACHE_SIZE:
+      self.cache.clear()
+      self.tilemap = tilemap
+      self.revision = tilemap.revision
+
+    tile_size = tilemap.tile_size
+    player_rect = player.rect()
+    player_tile = (player_rect.centerx // tile_size, player_rect.centery // tile_size)
+    for enemy in enemies:
+      ## Only enemies close enough to shoot (see Enemy.shooting_handler) need an answer
+      if enemy.harmless or abs(player.pos[0] - enemy.pos[0]) >= max_distance[0] or abs(player.pos[1] - enemy.pos[1]) >= max_distance[1]:
+        enemy.sees_player = False
+        continue
+
+      enemy_rect = enemy.rect()
+      key = (enemy_rect.centerx // tile_size, enemy_rect.centery // tile_size) + player_tile
+      visible = self.cache.get(key)
+      if visible is None:
+        visible = line_clear(tilemap.solid, key[0], key[1], key[2], key[3])
+        self.cache[key] = visible
+      enemy.sees_player = visible
@@ -0,0 +1,53 @@
+import pygame
+
+ACTIVE_MARGIN = 128 ## px around the view where entities update every frame
+NEAR_MARGIN = 480 ## px around the view where entities update every NEAR_INTERVAL frames
+NEAR_INTERVAL = 4
+RENDER_MARGIN = 16 ## px around the view where entities still get drawn
+
+class LodScheduler:
+  # Picks which entities to update and draw from how far they are from the camera:
+  #
+  #   active  on screen or within ACTIVE_MARGIN, updated every frame
+  #   near    within NEAR_MARGIN, updated once every NEAR_INTERVAL frames,
+  #           staggered by list index so they don't all tick on the same frame
+  #   far     asleep, not updated at all until the camera comes back
+  #
+  # Everything depends only on the camera, the tick count and list order,
+  # so a replay wakes and ticks the same entities on the same frames.
+
+  def __init__(self, active_margin = ACTIVE_MARGIN, near_margin = NEAR_MARGIN, near_interval = NEAR_INTERVAL):
+    self.active_margin = active_margin
+    self.near_margin = near_margin
+    self.near_interval = near_interval
+    self.tick = 0
+    self.active_rect = pygame.Rect(0, 0, 0, 0)
+    self.near_rect = pygame.Rect(0, 0, 0, 0)
+    self.render_rect = pygame.Rect(0, 0, 0, 0)
+
+  def reset(self):
+    self.tick = 0
+
+  def schedule(self, entities, scroll, view_size):
+    ## Entities to update this frame
+    self.tick += 1
+    left, top = int(scroll[0]), int(scroll[1])
+    active = self.active_rect
+    active.update(left - self.active_margin, top - self.active_margin, view_size[0] + 2 * self.active_margin, view_size[1] + 2 * self.active_margin)
+    near = self.near_rect
+    near.update(left - self.near_margin, top - self.near_margin, view_size[0] + 2 * self.near_margin, view_size[1] + 2 * self.near_margin)
+
+    scheduled = []
+    for i, entity in enumerate(entities):
+      pos = entity.pos
+      if active.collidepoint(pos):
+        scheduled.append(entity)
+      elif near.collidepoint(pos) and (self.tick + i) % self.near_interval == 0:
+        scheduled.append(entity)
+    return scheduled
+
+  def visible(self, entities, scroll, view_size):
+    ## Entities to draw, the rest would land outside the view
+    view = self.render_rect
+    view.update(int(scroll[0]) - RENDER_MARGIN, int(scroll[1]) - RENDER_MARGIN, view_size[0] + 2 * RENDER_MARGIN, view_size[1] + 2 * RENDER_MARGIN)
+    return [entity for entity in entities if view.collidepoint(entity.pos)]
@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import mmap
+import struct
+
+# Binary level format (.lvl), little endian:
+#
+#   header   magic 'NJMP', version, tile_size, origin x/y, width, height,
+#            type count, off grid count
+#   types    type names, each one byte of length + utf-8
+#   grid     width * height type ids (0 = empty, n = types[n - 1])
+#            followed by width * height variants, row by row
+#   offgrid  one (type id, variant, x, y) record per off grid tile
+#
+# Grids are read straight out of a memory map. Tiles are found with
+# bytes.translate/find, so Python only runs per tile, not per empty cell.
+
+BINARY_MAP_EXTENSION = '.lvl'
+MAGIC = b'NJMP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHiiIIHI')
+OFFGRID_RECORD = struct.Struct('<BBdd')
+## Type id -> 1 for a tile, 0 for an empty cell
+TILE_MARKS = bytes([0] + [1] * 255)
+
+def read_json_map(file_path):
+  file_connection = open(file_path, 'r') # Reading
+  data = json.load(file_connection)
+  file_connection.close()
+
+  tiles = []
+  for loc in data['tilemap']:
+    x, y = loc.split(';')
+    tiles.append(((int(x), int(y)), data['tilemap'][loc]))
+
+  return data['tile_size'], tiles, data['offgrid']
+
+def read_binary_map(file_path):
+  file_connection = open(file_path, 'rb')
+  try:
+    data = mmap.mmap(file_connection.fileno(), 0, access=mmap.ACCESS_READ)
+  finally:
+    file_connection.close()
+
+  try:
+    magic, version, tile_size, origin_x, origin_y, width, height, type_count, offgrid_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+      raise ValueError(file_path + ' is not a version ' + str(VERSION) + ' level file')
+
+    offset = HEADER.size
+    types = []
+    for _ in range(type_count):
+      length = data[offset]
+      types.append(data[offset + 1:offset + 1 + length].decode('utf-8'))
+      offset += 1 + length
+
+    cell_count = width * height
+    grid_start = offset
+    view = memoryview(data)
+    type_grid = view[grid_start:grid_start + cell_count]
+    variant_grid = view[grid_start + cell_count:grid_start + 2 * cell_count]
+    offset += 2 * cell_count
+
+    tiles = []
+    marks = data[grid_start:grid_start + cell_count].translate(TILE_MARKS)
+    i = marks.find(1)
+    while i >= 0:
+      x = origin_x + i % width
+      y = origin_y + i // width
+      tiles.append(((x, y), {'type': types[type_grid[i] - 1], 'variant': variant_grid[i]}))
+      i = marks.find(1, i + 1)
+
+    offgrid = []
+    for _ in range(offgrid_count):
+      type_id, variant, x, y = OFFGRID_RECORD.unpack_from(data, offset)
+      offgrid.append({'type': types[type_id - 1], 'variant': variant, 'pos': [x, y]})
+      offset += OFFGRID_RECORD.size
+
+    type_grid.release()
+    variant_grid.release()
+    view.release()
+  finally:
+    data.close()
+
+  return tile_size, tiles, offgrid
+
+def write_binary_map(file_path, tile_size, tiles, offgrid):
+  types = []
+  type_ids = {}
+  def type_id(name):
+    if name not in type_ids:
+      types.append(name)
+      type_ids[name] = len(types)
+    return type_ids[name]
+
+  if tiles:
+    xs = [loc[0] for loc, _ in tiles]
+    ys = [loc[1] for loc, _ in tiles]
+    origin_x, origin_y = min(xs), min(ys)
+    width, height = max(xs) - origin_x + 1, max(ys) - origin_y + 1
+  else:
+    origin_x = origin_y = width = height = 0
+
+  type_grid = bytearray(width * height)
+  variant_grid = bytearray(width * height)
+  for loc, tile in tiles:
+    i = (loc[1] - origin_y) * width + (loc[0] - origin_x)
+    type_grid[i] = type_id(tile['type'])
+    variant_grid[i] = tile['variant']
+
+  offgrid_records = bytearray()
+  for tile in offgrid:
+    offgrid_records += OFFGRID_RECORD.pack(type_id(tile['type']), tile['variant'], tile['pos'][0], tile['pos'][1])
+
+  if len(types) > 255:
+    raise ValueError('a level file holds at most 255 tile types')
+
+  file_connection = open(file_path, 'wb')
+  file_connection.write(HEADER.pack(MAGIC, VERSION, tile_size, origin_x, origin_y, width, height, len(types), len(offgrid)))
+  for name in types:
+    encoded = name.encode('utf-8')
+    file_connection.write(bytes([len(encoded)]) + encoded)
+  file_connection.write(type_grid)
+  file_connection.write(variant_grid)
+  file_connection.write(offgrid_records)
+  file_connection.close()
+
+def convert_json_map(json_path):
+  binary_path = os.path.splitext(json_path)[0] + BINARY_MAP_EXTENSION
+  tile_size, tiles, offgrid = read_json_map(json_path)
+  write_binary_map(binary_path, tile_size, tiles, offgrid)
+  return binary_path
+
+def level_file_name(path, map_id):
+  ## Binary level when it is at least as new as its JSON source
+  json_name = str(map_id) + '.json'
+  binary_name = str(map_id) + BINARY_MAP_EXTENSION
+
+  if os.path.exists(path + binary_name):
+    if not os.path.exists(path + json_name) or os.path.getmtime(path + binary_name) >= os.path.getmtime(path + json_name):
+      return binary_name
+  return json_name
+
+if __name__ == '__main__':
+  ## python -m scripts.map_format data/created_maps/*.json
+  for json_path in sys.argv[1:]:
+    binary_path = convert_json_map(json_path)
+    print(json_path + ' (' + str(os.path.getsize(json_path)) + ' bytes) -> ' + binary_path + ' (' + str(os.path.getsize(binary_path)) + ' bytes)')
@@ -0,0 +1,61 @@
+import pygame
+
+BUCKET_SIZE = 128 ## Pixels, same as a tile chunk with 16px tiles
+
+class OffgridIndex:
+  # Uniform grid over off grid tiles (decorations, spawners).
+  # Every tile is stored once per bucket its image rect touches, so
+  # a query only looks at the buckets under the requested area.
+
+  def __init__(self, bucket_size = BUCKET_SIZE):
+    self.bucket_size = bucket_size
+    self.buckets = {}
+    self.entries = {} ## id(tile) -> (order, rect, tile)
+    self.next_order = 0
+
+  def clear(self):
+    self.buckets = {}
+    self.entries = {}
+    self.next_order = 0
+
+  def bucket_range(self, rect):
+    size = self.bucket_size
+    for bx in range(rect.left // size, (rect.right - 1) // size + 1):
+      for by in range(rect.top // size, (rect.bottom - 1) // size + 1):
+        yield (bx, by)
+
+  def add(self, tile, size):
+    rect = pygame.Rect(int(tile['pos'][0]), int(tile['pos'][1]), size[0], size[1])
+    entry = (self.next_order, rect, tile)
+    self.next_order += 1
+
+    self.entries[id(tile)] = entry
+    for bucket_loc in self.bucket_range(rect):
+      self.buckets.setdefault(bucket_loc, []).append(entry)
+
+  def remove(self, tile):
+    entry = self.entries.pop(id(tile), None)
+    if entry is None:
+      return
+
+    for bucket_loc in self.bucket_range(entry[1]):
+      bucket = self.buckets[bucket_loc]
+      bucket.remove(entry)
+      if not bucket:
+        del self.buckets[bucket_loc]
+
+  def query(self, rect):
+    # Entries touching rect, in the order they were added (draw order)
+    found = {}
+    for bucket_loc in self.bucket_range(rect):
+      bucket = self.buckets.get(bucket_loc)
+      if bucket:
+        for entry in bucket:
+          if entry[1].colliderect(rect):
+            found[entry[0]] = entry
+
+    return [found[order] for order in sorted(found)]
+
+  def at_point(self, pos):
+    bucket = self.buckets.get((int(pos[0] // self.bucket_size), int(pos[1] // self.bucket_size)), [])
+    return [entry[2] for entry in bucket if entry[1].collidepoint(pos)]
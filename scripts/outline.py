@@ -0,0 +1,33 @@
+import pygame
+
+OUTLINE_OFFSETS = [(-1, 0), (1, 0), (0, 1), (0, -1)]
+
+def outline_surface(img):
+  # Black silhouette of img spread one pixel up, down, left and right.
+  # The result is 2px bigger than img and meant to be drawn 1px up and left of it.
+  mask = pygame.mask.from_surface(img)
+  silhouette = mask.to_surface(setcolor = (0, 0, 0, 255), unsetcolor = (0, 0, 0, 0))
+
+  outline = pygame.Surface((img.get_width() + 2, img.get_height() + 2), pygame.SRCALPHA)
+  for offset in OUTLINE_OFFSETS:
+    outline.blit(silhouette, (1 + offset[0], 1 + offset[1]))
+  return outline
+
+class Outliner:
+  # Draws cached outlines of sprites onto the layer behind the game display,
+  # replacing a full screen mask of the finished frame.
+
+  def __init__(self, target):
+    self.target = target
+    self.cache = {}
+
+  def get(self, img):
+    outline = self.cache.get(img)
+    if outline is None:
+      outline = outline_surface(img)
+      self.cache[img] = outline
+    return outline
+
+  def blit(self, img, pos):
+    ## Same truncation blit() does on the sprite position, then 1px up and left
+    self.target.blit(self.get(img), (int(pos[0]) - 1, int(pos[1]) - 1))
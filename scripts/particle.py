@@ -1,31 +1,131 @@
-import pygame
+import math
+from array import array
 
+## Particle types that drift left and right while falling
+SWAY_TYPES = { 'leaf' }
 
-class Particle:
-  def __init__(self, game, particle_type, pos, velocity=[0,0], frame=0):
+class ParticleSystem:
+  # Every particle lives in a slot of flat, preallocated arrays (one per field).
+  # Dead particles are swap-removed with the last live one and the whole
+  # batch is drawn with a single blits() call.
+
+  def __init__(self, game, capacity = 256):
     self.game = game
-    self.p_type = particle_type
-    self.pos = list(pos)
-    self.velocity = list(velocity)
-    self.animation = self.game.assets['particles'][self.p_type].copy()
-    self.animation.frame = frame
+    self.capacity = capacity
+    self.count = 0
+
+    self.x = array('d', [0.0]) * capacity
+    self.y = array('d', [0.0]) * capacity
+    self.vx = array('d', [0.0]) * capacity
+    self.vy = array('d', [0.0]) * capacity
+    self.frame = array('l', [0]) * capacity
+    self.kind = array('B', [0]) * capacity
+    ## Finished particles move and get drawn one last time, then go on the next update
+    self.done = array('B', [0]) * capacity
+
+    ## Per type animation data, indexed by the ids stored in self.kind
+    self.type_ids = {}
+    self.frames = []       ## (img, half_width, half_height) per animation image
+    self.img_durations = []
+    self.last_frames = []
+    self.loops = []
+    self.sways = []
+    for p_type, animation in game.assets['particles'].items():
+      self.type_ids[p_type] = len(self.frames)
+      self.frames.append([(img, img.get_width() // 2, img.get_height() // 2) for img in animation.images])
+      self.img_durations.append(animation.img_duration)
+      self.last_frames.append(animation.img_duration * len(animation.images) - 1)
+      self.loops.append(animation.loop)
+      self.sways.append(p_type in SWAY_TYPES)
+
+  def __len__(self):
+    return self.count
+
+  def clear(self):
+    self.count = 0
+
+  def grow(self):
+    for field in (self.x, self.y, self.vx, self.vy, self.frame, self.kind, self.done):
+      field.extend(field[:self.capacity])
+    self.capacity *= 2
+
+  def spawn(self, particle_type, pos, velocity = (0, 0), frame = 0):
+    if self.count == self.capacity:
+      self.grow()
+
+    i = self.count
+    self.x[i] = pos[0]
+    self.y[i] = pos[1]
+    self.vx[i] = velocity[0]
+    self.vy[i] = velocity[1]
+    self.frame[i] = frame
+    self.kind[i] = self.type_ids[particle_type]
+    self.done[i] = 0
+    self.count += 1
+
+  def kill(self, i):
+    last = self.count - 1
+    self.x[i] = self.x[last]
+    self.y[i] = self.y[last]
+    self.vx[i] = self.vx[last]
+    self.vy[i] = self.vy[last]
+    self.frame[i] = self.frame[last]
+    self.kind[i] = self.kind[last]
+    self.done[i] = self.done[last]
+    self.count = last
 
   def update(self):
-    kill = False
-    if self.animation.done:
-      kill = True
-    
-    self.pos[0] = self.pos[0] + self.velocity[0]
-    self.pos[1] = self.pos[1] + self.velocity[1]
-    self.animation.update()
-    
-    return kill
-  
-  def render(self, surf, offset=(0,0)):
-    img= self.animation.img()
-    
-    ## Getting image's center and applying offset
-    img_x_center = self.pos[0] - offset[0] - img.get_width() // 2 
-    img_y_center = self.pos[1] - offset[1] - img.get_height() // 2
-    
-    surf.blit(img, (img_x_center, img_y_center))
\ No newline at end of file
+    x, y, vx, vy, frame, kind, done = self.x, self.y, self.vx, self.vy, self.frame, self.kind, self.done
+    last_frames, loops, sways = self.last_frames, self.loops, self.sways
+    sin = math.sin
+
+    i = 0
+    while i < self.count:
+      if done[i]:
+        ## Its final frame was drawn after the previous update
+        self.kill(i)
+        continue
+
+      k = kind[i]
+      f = frame[i]
+      last_frame = last_frames[k]
+
+      if loops[k]:
+        f = (f + 1) % (last_frame + 1)
+      elif f >= last_frame:
+        ## Animation finished on the previous update, still moves and shows once more
+        done[i] = 1
+      else:
+        f += 1
+      frame[i] = f
+
+      x[i] += vx[i]
+      y[i] += vy[i]
+      if sways[k]:
+        ## Moving particle left to right. The sway only shows from the next
+        ## frame on, render draws the particle without it
+        x[i] += sin(f * 0.035) * 0.3
+      i += 1
+
+  def render(self, surf, offset = (0, 0), alpha = 1.0):
+    x, y, vx, vy, frame, kind = self.x, self.y, self.vx, self.vy, self.frame, self.kind
+    frames, img_durations, sways = self.frames, self.img_durations, self.sways
+    ox, oy = offset[0], offset[1]
+    sin = math.sin
+    ## One tick ago a particle was drawn its velocity (and the previous sway) back
+    back = 1 - alpha
+
+    batch = []
+    for i in range(self.count):
+      k = kind[i]
+      f = frame[i]
+      img, half_w, half_h = frames[k][f // img_durations[k]]
+      if sways[k]:
+        ## The sway added by the last update is not drawn yet
+        px = x[i] - sin(f * 0.035) * 0.3 - (vx[i] + sin((f - 1) * 0.035) * 0.3) * back
+      else:
+        px = x[i] - vx[i] * back
+      ## Getting image's center and applying offset
+      batch.append((img, (px - ox - half_w, y[i] - vy[i] * back - oy - half_h)))
+
+    surf.blits(batch, False)
@@ -3,8 +3,6 @@ import random
 
 import pygame
 from scripts.entities import PhysicsEntity
-from scripts.particle import Particle
-from scripts.spark import Spark
 
 DASH_COOLDOWN_FRAMES = 50
 DASH_ACTIVE_FRAMES = 10
@@ -12,6 +10,7 @@ PLAYER_SIZE = (8, 15)
 DASH_SIZE = (8, 15)
 
 class Player(PhysicsEntity):
+  __slots__ = ('air_time', 'jumps', 'wall_sliding', 'dead', 'dash_info')
   
   def __init__(self, game, pos):
     super().__init__(game, 'player', pos, PLAYER_SIZE)
@@ -110,9 +109,8 @@ class Player(PhysicsEntity):
       self.velocity[0] = self.dash_info['direction'] * self.dash_info['ratio']
       
       if not self.game.debug_mode:
-        p_velocity = [self.dash_info['direction'] * random.random() * 3, 0]
-        dash_particle = Particle(self.game, 'dash', self.rect().center, p_velocity, random.randint(0, 7))
-        self.game.particles.append(dash_particle)
+        p_velocity = [self.dash_info['direction'] * self.game.rng.random() * 3, 0]
+        self.game.particles.spawn('dash', self.rect().center, p_velocity, self.game.rng.randint(0, 7))
       
       if self.dash_info['active_frames'] == 0: # Resetting  dash
         self.dash_particle_burst()
@@ -128,12 +126,13 @@ class Player(PhysicsEntity):
       if self.game.debug_mode:
         print('Dash started')
   
-  def render(self, surf, offset=(0,0)):
+  def render(self, surf, offset=(0,0), outline = None, alpha = 1.0):
     if not self.dash_info['direction']:
-      super().render(surf, offset)
+      super().render(surf, offset, outline, alpha)
     
     if self.game.debug_mode:
-      pygame.draw.rect(surf, (0, 0, 0), pygame.Rect(self.pos[0] - offset[0], self.pos[1] - offset[1], self.size[0], self.size[1]))
+      x, y = self.render_pos(alpha)
+      pygame.draw.rect(surf, (0, 0, 0), pygame.Rect(x - offset[0], y - offset[1], self.size[0], self.size[1]))
     
   
   def dash_particle_burst(self):
@@ -141,11 +140,10 @@ class Player(PhysicsEntity):
       pass
     # Burst Particles
     for i in range(20):
-      angle = random.random() * math.pi * 2
-      speed = random.random() * 0.5 + 0.5
+      angle = self.game.rng.random() * math.pi * 2
+      speed = self.game.rng.random() * 0.5 + 0.5
       p_velocity = [math.cos(angle) * speed, math.sin(angle) * speed]
-      dash_particle = Particle(self.game, 'dash', self.rect().center, p_velocity, random.randint(0, 7))
-      self.game.particles.append(dash_particle)
+      self.game.particles.spawn('dash', self.rect().center, p_velocity, self.game.rng.randint(0, 7))
   
   def death(self):
     self.game.screenshake = max(16, self.game.screenshake)
@@ -154,13 +152,13 @@ class Player(PhysicsEntity):
     
     for i in range(30):
       pos = self.rect().center
-      angle = random.random() * math.pi * 2
-      speed = random.random() + 2
-      self.game.sparks.append(Spark(pos, angle, speed))
+      angle = self.game.rng.random() * math.pi * 2
+      speed = self.game.rng.random() + 2
+      self.game.sparks.spawn(pos, angle, speed)
       
-      speed = random.random() * 5
+      speed = self.game.rng.random() * 5
       p_velocity = [math.cos(angle) * speed, math.sin(angle) * speed]
-      self.game.particles.append(Particle(self.game, 'dash', self.rect().center, p_velocity, random.randint(0, 7)))
+      self.game.particles.spawn('dash', self.rect().center, p_velocity, self.game.rng.randint(0, 7))
   
   def death_sound(self):
     sounds: list[pygame.mixer.Sound] = self.game.sounds['hurts']
@@ -0,0 +1,45 @@
+import pygame
+
+DEFAULT_WINDOW_SIZE = (640, 480)
+
+def parse_window_size(text):
+  ## '1280x720' -> (1280, 720), for the --window command line option
+  width, height = text.lower().split('x')
+  size = (int(width), int(height))
+  if size[0] <= 0 or size[1] <= 0:
+    raise ValueError('window size must be positive')
+  return size
+
+class Presenter:
+  # Puts the low resolution frame on the window at the biggest whole number
+  # scale that fits, centred, with black bars around it (letterboxing).
+  # The scaled frame goes into a surface allocated once per window size,
+  # so presenting a frame allocates nothing.
+
+  def __init__(self, screen, source):
+    self.screen = screen
+    self.source_size = source.get_size()
+    self.source = source
+    self.resize()
+
+  def resize(self):
+    ## Call again after the window changes size
+    window_w, window_h = self.screen.get_size()
+    source_w, source_h = self.source_size
+    self.scale = max(1, min(window_w // source_w, window_h // source_h))
+    size = (source_w * self.scale, source_h * self.scale)
+    self.offset = ((window_w - size[0]) // 2, (window_h - size[1]) // 2)
+    self.letterboxed = size != (window_w, window_h)
+    ## Same pixel format as the frames it receives
+    self.scaled = pygame.Surface(size, 0, self.source)
+
+  def present(self, surf, shake = (0, 0)):
+    pygame.transform.scale(surf, self.scaled.get_size(), self.scaled)
+    if self.letterboxed or shake[0] or shake[1]:
+      ## Bars and the edges uncovered by screenshake
+      self.screen.fill((0, 0, 0))
+    self.screen.blit(self.scaled, (self.offset[0] + shake[0] * self.scale, self.offset[1] + shake[1] * self.scale))
+
+  def to_source(self, pos):
+    ## Window coordinates (mouse) to coordinates on the low resolution frame
+    return ((pos[0] - self.offset[0]) / self.scale, (pos[1] - self.offset[1]) / self.scale)
@@ -0,0 +1,106 @@
+import csv
+import time
+from collections import deque
+
+## In the order they happen during a frame
+PHASES = [
+  'input',
+  'level',        ## Transitions, respawn, level loading and camera
+  'clouds',
+  'tilemap',
+  'enemies',
+  'player',
+  'projectiles',
+  'sparks',
+  'particles',
+  'transition',
+  'debug',
+  'present',      ## Final scale and flip
+]
+
+class FrameProfiler:
+  # Frame time split by phase.
+  # mark(phase) charges the time since the previous mark to `phase`, so
+  # a phase that is split between update and render adds up both parts.
+
+  def __init__(self, phases = PHASES, window = 60):
+    self.phases = phases
+    self.enabled = False
+    self.current = dict.fromkeys(phases, 0.0)
+    self.history = {phase: deque(maxlen=window) for phase in phases}
+    self.totals = deque(maxlen=window)
+    self.last = time.perf_counter()
+    self.frame = 0
+
+    self.csv_file = None
+    self.csv_writer = None
+
+  def set_enabled(self, enabled):
+    ## Marks are skipped while disabled, so switching on (F3 mid frame) restarts
+    ## the frame, otherwise the next mark would be charged all the time since
+    self.enabled = enabled
+    self.reset_frame()
+
+  def reset_frame(self):
+    for phase in self.phases:
+      self.current[phase] = 0.0
+    self.last = time.perf_counter()
+
+  def begin_frame(self):
+    if not self.enabled:
+      return
+    self.reset_frame()
+
+  def mark(self, phase):
+    if not self.enabled:
+      return
+    now = time.perf_counter()
+    self.current[phase] += now - self.last
+    self.last = now
+
+  def end_frame(self):
+    if not self.enabled:
+      return
+
+    total = 0.0
+    for phase in self.phases:
+      self.history[phase].append(self.current[phase])
+      total += self.current[phase]
+    self.totals.append(total)
+
+    if self.csv_writer:
+      self.csv_writer.writerow([self.frame] + [round(self.current[phase] * 1000, 4) for phase in self.phases] + [round(total * 1000, 4)])
+    self.frame += 1
+
+  def start_csv(self, path):
+    self.stop_csv()
+    self.csv_file = open(path, 'w', newline='')
+    self.csv_writer = csv.writer(self.csv_file)
+    self.csv_writer.writerow(['frame'] + [phase + '_ms' for phase in self.phases] + ['total_ms'])
+    self.set_enabled(True)
+
+  def stop_csv(self):
+    if self.csv_file:
+      self.csv_file.close()
+    self.csv_file = None
+    self.csv_writer = None
+
+  def average_ms(self, phase):
+    samples = self.history[phase]
+    return sum(samples) / len(samples) * 1000 if samples else 0.0
+
+  def max_ms(self, phase):
+    samples = self.history[phase]
+    return max(samples) * 1000 if samples else 0.0
+
+  def render(self, surf, font, pos = (0, 0), color = (0, 0, 0)):
+    ## Rolling average and worst frame of every phase
+    line_height = font.get_linesize()
+    y = pos[1]
+    for phase in self.phases:
+      text = phase + ': ' + format(self.average_ms(phase), '.2f') + ' ms (max ' + format(self.max_ms(phase), '.2f') + ')'
+      surf.blit(font.render(text, False, color), (pos[0], y))
+      y += line_height
+
+    total = sum(self.totals) / len(self.totals) * 1000 if self.totals else 0.0
+    surf.blit(font.render('frame: ' + format(total, '.2f') + ' ms', False, color), (pos[0], y))
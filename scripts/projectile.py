@@ -0,0 +1,116 @@
+import math
+from array import array
+
+PROJECTILE_LIFETIME = 180 ## Frames
+UNCHECKED_COLUMN = -2 ** 31
+
+class ProjectileSystem:
+  # Enemy projectiles stored in flat arrays and moved in one pass.
+  # Projectiles only fly horizontally through a tilemap that does not change
+  # during play, so the solid tile lookup is redone only when one crosses
+  # into a new tile column, and the player hit test is one bounds check.
+
+  def __init__(self, game, capacity = 64):
+    self.game = game
+    self.capacity = capacity
+    self.count = 0
+
+    self.x = array('d', [0.0]) * capacity
+    self.y = array('d', [0.0]) * capacity
+    self.vx = array('d', [0.0]) * capacity
+    self.timer = array('l', [0]) * capacity
+    self.tile_x = array('l', [0]) * capacity
+    ## Projectiles that hit something get drawn where they hit, then go on the next update
+    self.done = array('B', [0]) * capacity
+
+  def __len__(self):
+    return self.count
+
+  def clear(self):
+    self.count = 0
+
+  def grow(self):
+    for field in (self.x, self.y, self.vx, self.timer, self.tile_x, self.done):
+      field.extend(field[:self.capacity])
+    self.capacity *= 2
+
+  def spawn(self, pos, velocity, timer = PROJECTILE_LIFETIME):
+    if self.count == self.capacity:
+      self.grow()
+
+    i = self.count
+    self.x[i] = pos[0]
+    self.y[i] = pos[1]
+    self.vx[i] = velocity
+    self.timer[i] = timer
+    self.tile_x[i] = UNCHECKED_COLUMN
+    self.done[i] = 0
+    self.count += 1
+
+  def kill(self, i):
+    last = self.count - 1
+    self.x[i] = self.x[last]
+    self.y[i] = self.y[last]
+    self.vx[i] = self.vx[last]
+    self.timer[i] = self.timer[last]
+    self.tile_x[i] = self.tile_x[last]
+    self.done[i] = self.done[last]
+    self.count = last
+
+  def update(self):
+    game = self.game
+    tilemap = game.tilemap
+    tile_size = tilemap.tile_size
+    player = game.player
+    x, y, vx, timer, tile_x, done = self.x, self.y, self.vx, self.timer, self.tile_x, self.done
+
+    ## Player hitbox, checked against every projectile
+    vulnerable = not player.dead and not player.dash_info['active_frames']
+    if vulnerable:
+      player_rect = player.rect()
+      left, top, right, bottom = player_rect.left, player_rect.top, player_rect.right, player_rect.bottom
+
+    i = 0
+    while i < self.count:
+      if done[i]:
+        ## Its final position was drawn after the previous update
+        self.kill(i)
+        continue
+
+      x[i] += vx[i]
+      timer[i] -= 1
+
+      column = int(x[i] // tile_size)
+      if column != tile_x[i]:
+        tile_x[i] = column
+        if tilemap.is_solid_block((x[i], y[i])):
+          for _ in range(4):
+            angle = game.rng.random() - 0.5 + (math.pi if vx[i] > 0 else 0)
+            speed = game.rng.random() + 2
+            game.sparks.spawn((x[i], y[i]), angle, speed)
+          done[i] = 1
+          i += 1
+          continue
+
+      if timer[i] <= 0:
+        done[i] = 1
+      elif vulnerable and left <= x[i] < right and top <= y[i] < bottom:
+        done[i] = 1
+        player.death()
+        vulnerable = False
+
+      i += 1
+
+  def render(self, surf, offset = (0, 0), outline = None, alpha = 1.0):
+    img = self.game.assets['projectile']
+    ox = offset[0] + img.get_width() / 2
+    oy = offset[1] + img.get_height() / 2
+    x, y, vx = self.x, self.y, self.vx
+    ## Projectiles move vx per tick, so the previous position is one step back
+    back = 1 - alpha
+
+    batch = [(img, (x[i] - vx[i] * back - ox, y[i] - oy)) for i in range(self.count)]
+    surf.blits(batch, False)
+    if outline:
+      for _, pos in batch:
+        outline.blit(img, pos)
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+
+import pygame
+
+from scripts.outline import outline_surface
+from scripts.tile_storage import CHUNK_SHIFT, CHUNK_SIZE, chunk_of
+
+CHUNK_CACHE_MARGIN = 1 ## Rings of chunks around the view kept cached, beyond what the view can show
+
+class ChunkRenderCache:
+  # On grid tiles pre-rendered into one surface per chunk.
+  # A chunk surface is built the first time it is on camera and
+  # rebuilt only after a tile inside it changes.
+  # Only about as many chunks as fit on screen (plus CHUNK_CACHE_MARGIN)
+  # are kept, the least recently drawn ones go first, so memory stays
+  # the same however big the map is.
+
+  def __init__(self, tilemap):
+    self.tilemap = tilemap
+    self.surfaces = OrderedDict()
+    self.outlines = {}
+    self.view_size = None
+    self.cache_size = 0
+
+  def clear(self):
+    self.surfaces = OrderedDict()
+    self.outlines = {}
+
+  def invalidate(self, loc):
+    chunk_loc = chunk_of(loc[0], loc[1])
+    self.surfaces.pop(chunk_loc, None)
+    self.outlines.pop(chunk_loc, None)
+
+  def fit_view(self, view_size):
+    ## Most chunks a view of this size can touch at once, plus the margin all around
+    self.view_size = view_size
+    chunk_px = CHUNK_SIZE * self.tilemap.tile_size
+    columns = view_size[0] // chunk_px + 2 + 2 * CHUNK_CACHE_MARGIN
+    rows = view_size[1] // chunk_px + 2 + 2 * CHUNK_CACHE_MARGIN
+    self.cache_size = columns * rows
+
+  def chunk_surface(self, chunk_loc):
+    surf = self.surfaces.get(chunk_loc)
+    if surf is not None:
+      self.surfaces.move_to_end(chunk_loc)
+      return surf
+
+    tile_size = self.tilemap.tile_size
+    assets = self.tilemap.game.assets
+    base_x = chunk_loc[0] << CHUNK_SHIFT
+    base_y = chunk_loc[1] << CHUNK_SHIFT
+
+    surf = pygame.Surface((CHUNK_SIZE * tile_size, CHUNK_SIZE * tile_size), pygame.SRCALPHA)
+    for x, y, tile in self.tilemap.tilemap.chunk_tiles(chunk_loc):
+      surf.blit(assets[tile['type']][tile['variant']], ((x - base_x) * tile_size, (y - base_y) * tile_size))
+    self.surfaces[chunk_loc] = surf
+    while len(self.surfaces) > self.cache_size:
+      ## An outline is only ever built from a cached surface, so it goes with it
+      old_loc, _ = self.surfaces.popitem(last=False)
+      self.outlines.pop(old_loc, None)
+    return surf
+
+  def chunk_outline(self, chunk_loc):
+    outline = self.outlines.get(chunk_loc)
+    if outline is None:
+      outline = outline_surface(self.chunk_surface(chunk_loc))
+      self.outlines[chunk_loc] = outline
+    return outline
+
+  def render(self, surf, offset = (0, 0), outline = None):
+    chunk_px = CHUNK_SIZE * self.tilemap.tile_size
+    chunks = self.tilemap.tilemap.chunks
+    if surf.get_size() != self.view_size:
+      self.fit_view(surf.get_size())
+
+    # Same idea as rendering tiles on camera, but a whole chunk at a time
+    for cx in range(offset[0] // chunk_px, (offset[0] + surf.get_width()) // chunk_px + 1):
+      for cy in range(offset[1] // chunk_px, (offset[1] + surf.get_height()) // chunk_px + 1):
+        if (cx, cy) in chunks:
+          surf.blit(self.chunk_surface((cx, cy)), (cx * chunk_px - offset[0], cy * chunk_px - offset[1]))
+          if outline:
+            outline.target.blit(self.chunk_outline((cx, cy)), (cx * chunk_px - offset[0] - 1, cy * chunk_px - offset[1] - 1))
@@ -0,0 +1,58 @@
+import struct
+
+# Replay file (.rpl), little endian:
+#
+#   header  magic 'NJRP', version, seed, start level, frame count
+#   inputs  one byte per simulated frame (INPUT_* flags below)
+#   hash    sha256 of Game.state_hash() after the last frame
+#
+# Gameplay randomness comes from Game.rng seeded with `seed`, so the same
+# inputs from the same level always play out the same way.
+
+MAGIC = b'NJRP'
+VERSION = 1
+HEADER = struct.Struct('<4sHQHI')
+HASH_SIZE = 32
+
+## Held keys
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+## One shot actions
+INPUT_JUMP = 4
+INPUT_DASH = 8
+INPUT_DEBUG = 16
+
+class Recording:
+  def __init__(self, seed, level, inputs = None, state_hash = b''):
+    self.seed = seed
+    self.level = level
+    self.inputs = inputs if inputs is not None else bytearray()
+    self.state_hash = state_hash
+
+  def record(self, frame_input):
+    self.inputs.append(frame_input)
+
+  def save(self, path, state_hash):
+    self.state_hash = state_hash
+    file_connection = open(path, 'wb')
+    file_connection.write(HEADER.pack(MAGIC, VERSION, self.seed, self.level, len(self.inputs)))
+    file_connection.write(self.inputs)
+    file_connection.write(state_hash)
+    file_connection.close()
+
+  @staticmethod
+  def load(path):
+    file_connection = open(path, 'rb')
+    data = file_connection.read()
+    file_connection.close()
+
+    magic, version, seed, level, frame_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+      raise ValueError(path + ' is not a version ' + str(VERSION) + ' replay file')
+
+    inputs = data[HEADER.size:HEADER.size + frame_count]
+    state_hash = data[HEADER.size + frame_count:HEADER.size + frame_count + HASH_SIZE]
+    if len(inputs) != frame_count or len(state_hash) != HASH_SIZE:
+      raise ValueError(path + ' is truncated')
+
+    return Recording(seed, level, bytearray(inputs), state_hash)
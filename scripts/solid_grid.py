@@ -0,0 +1,113 @@
+SOLID = b'\x01'
+
+class SolidGrid:
+  # Which grid cells hold a physics tile, one byte per cell in a dense
+  # row major bytearray. The grid covers the bounding box of every solid
+  # tile set so far (plus some slack) and grows when a tile lands outside.
+  # Queries index the bytearray directly and never allocate: a row scan is
+  # one bytearray.find, everything outside the box is empty.
+
+  def __init__(self):
+    self.clear()
+
+  def clear(self):
+    self.origin_x = 0
+    self.origin_y = 0
+    self.width = 0
+    self.height = 0
+    self.cells = bytearray()
+
+  def grow(self, x, y):
+    ## Room for (x, y) plus as much slack again as the grid already has, so
+    ## loading a map tile by tile only copies the cells a few times
+    if self.width == 0:
+      left, top, right, bottom = x, y, x + 1, y + 1
+    else:
+      left = min(self.origin_x, x)
+      top = min(self.origin_y, y)
+      right = max(self.origin_x + self.width, x + 1)
+      bottom = max(self.origin_y + self.height, y + 1)
+      if left < self.origin_x:
+        left -= self.width
+      if right > self.origin_x + self.width:
+        right += self.width
+      if top < self.origin_y:
+        top -= self.height
+      if bottom > self.origin_y + self.height:
+        bottom += self.height
+
+    width = right - left
+    cells = bytearray(width * (bottom - top))
+    for row in range(self.height):
+      start = (self.origin_y + row - top) * width + (self.origin_x - left)
+      cells[start:start + self.width] = self.cells[row * self.width:(row + 1) * self.width]
+
+    self.origin_x, self.origin_y = left, top
+    self.width, self.height = width, bottom - top
+    self.cells = cells
+
+  def set(self, x, y, solid):
+    gx = x - self.origin_x
+    gy = y - self.origin_y
+    if not (0 <= gx < self.width and 0 <= gy < self.height):
+      if not solid:
+        return
+      self.grow(x, y)
+      gx = x - self.origin_x
+      gy = y - self.origin_y
+    self.cells[gy * self.width + gx] = 1 if solid else 0
+
+  def get(self, x, y):
+    gx = x - self.origin_x
+    gy = y - self.origin_y
+    if 0 <= gx < self.width and 0 <= gy < self.height:
+      return self.cells[gy * self.width + gx] == 1
+    return False
+
+  def first_in_row(self, y, x0, x1):
+    ## First solid x going from x0 to x1 (both included, either direction), None if there is none
+    gy = y - self.origin_y
+    if not 0 <= gy < self.height:
+      return None
+    row = gy * self.width
+    if x0 <= x1:
+      start = max(x0 - self.origin_x, 0)
+      end = min(x1 - self.origin_x + 1, self.width)
+      i = self.cells.find(SOLID, row + start, row + end) if start < end else -1
+    else:
+      start = max(x1 - self.origin_x, 0)
+      end = min(x0 - self.origin_x + 1, self.width)
+      i = self.cells.rfind(SOLID, row + start, row + end) if start < end else -1
+    return None if i < 0 else i - row + self.origin_x
+
+  def first_in_column(self, x, y0, y1):
+    ## First solid y going from y0 to y1 (both included, either direction), None if there is none
+    gx = x - self.origin_x
+    if not 0 <= gx < self.width:
+      return None
+    step = 1 if y1 >= y0 else -1
+    start = min(max(y0 - self.origin_y, -1), self.height)
+    end = min(max(y1 - self.origin_y, -1), self.height)
+    cells, width = self.cells, self.width
+    for gy in range(start, end + step, step):
+      if 0 <= gy < self.height and cells[gy * width + gx]:
+        return gy + self.origin_y
+    return None
+
+  def first_column(self, x0, x1, y0, y1):
+    ## First x going from x0 to x1 with a solid cell in rows y0 to y1, None if there is none
+    hit = None
+    for y in range(y0, y1 + 1):
+      x = self.first_in_row(y, x0, x1 if hit is None else hit)
+      if x is not None:
+        hit = x
+    return hit
+
+  def first_row(self, y0, y1, x0, x1):
+    ## First y going from y0 to y1 with a solid cell in columns x0 to x1, None if there is none
+    hit = None
+    for x in range(x0, x1 + 1):
+      y = self.first_in_column(x, y0, y1 if hit is None else hit)
+      if y is not None:
+        hit = y
+    return hit
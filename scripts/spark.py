@@ -1,30 +1,121 @@
-
 import math
+from array import array
 
 import pygame
 
+ANGLE_BUCKETS = 64 ## Directions a spark sprite is baked for
+SPEED_STEPS = 4 ## Sprite sizes baked per unit of speed
+
+
+class SparkSystem:
+  # Sparks stored in flat arrays. The direction of a spark never changes,
+  # so cos/sin of its angle are computed once at spawn time.
+  # Drawing is batched: the diamond of a spark only depends on its direction
+  # and speed, so it is baked once per (angle bucket, speed step) into a small
+  # sprite and all sparks go out in a single surf.blits call.
+
+  def __init__(self, capacity = 128):
+    self.capacity = capacity
+    self.count = 0
+
+    self.x = array('d', [0.0]) * capacity
+    self.y = array('d', [0.0]) * capacity
+    self.dx = array('d', [0.0]) * capacity
+    self.dy = array('d', [0.0]) * capacity
+    self.speed = array('d', [0.0]) * capacity
+    self.bucket = array('H', [0]) * capacity
+
+    self.sprites = {}
+
+  def __len__(self):
+    return self.count
+
+  def clear(self):
+    self.count = 0
+
+  def grow(self):
+    for field in (self.x, self.y, self.dx, self.dy, self.speed, self.bucket):
+      field.extend(field[:self.capacity])
+    self.capacity *= 2
 
-class Spark:
-  def __init__(self, pos, angle, speed):
-    self.pos = list(pos)
+  def spawn(self, pos, angle, speed):
     ## Angle starting from the right
-    self.angle = angle 
-    self.speed = speed
-  
+    if self.count == self.capacity:
+      self.grow()
+
+    i = self.count
+    self.x[i] = pos[0]
+    self.y[i] = pos[1]
+    self.dx[i] = math.cos(angle)
+    self.dy[i] = math.sin(angle)
+    self.speed[i] = speed
+    self.bucket[i] = round(angle / math.tau * ANGLE_BUCKETS) % ANGLE_BUCKETS
+    self.count += 1
+
   def update(self):
-    self.pos[0] = self.pos[0] + math.cos(self.angle) * self.speed
-    self.pos[1] = self.pos[1] + math.sin(self.angle) * self.speed
-    self.speed = max(0, self.speed - 0.1)
-    return not self.speed
-
-  def render(self, surf, offset=(0,0)):
-    render_points = [
-      (self.pos[0] + math.cos(self.angle) * self.speed * 3 - offset[0], self.pos[1] + math.sin(self.angle) * self.speed * 3 - offset[1]),
-      (self.pos[0] + math.cos(self.angle + math.pi * 0.5) * self.speed * 0.5 - offset[0], self.pos[1] + math.sin(self.angle + math.pi * 0.5) * self.speed * 0.5 - offset[1]),
-      (self.pos[0] + math.cos(self.angle + math.pi) * self.speed * 3 - offset[0], self.pos[1] + math.sin(self.angle + math.pi) * self.speed * 3 - offset[1]),
-      (self.pos[0] + math.cos(self.angle - math.pi * 0.5) * self.speed * 0.5 - offset[0], self.pos[1] + math.sin(self.angle - math.pi * 0.5) * self.speed * 0.5 - offset[1]),
-      
-    ]
-    
-    pygame.draw.polygon(surf, (255, 255, 255), render_points)
-  
\ No newline at end of file
+    x, y, dx, dy, speed, bucket = self.x, self.y, self.dx, self.dy, self.speed, self.bucket
+
+    i = 0
+    while i < self.count:
+      s = speed[i]
+      x[i] += dx[i] * s
+      y[i] += dy[i] * s
+      s = s - 0.1
+
+      if s <= 0:
+        ## Swap-remove with the last spark
+        last = self.count - 1
+        x[i] = x[last]
+        y[i] = y[last]
+        dx[i] = dx[last]
+        dy[i] = dy[last]
+        speed[i] = speed[last]
+        bucket[i] = bucket[last]
+        self.count = last
+        continue
+
+      speed[i] = s
+      i += 1
+
+  def sprite(self, bucket, step):
+    ## Returns (surface, half size), the surface centred on the spark
+    key = (bucket, step)
+    sprite = self.sprites.get(key)
+    if sprite is None:
+      angle = bucket / ANGLE_BUCKETS * math.tau
+      dx, dy = math.cos(angle), math.sin(angle)
+      speed = step / SPEED_STEPS
+      half = math.ceil(speed * 3) + 1
+      ## Long axis along the direction, short axis perpendicular to it
+      long_x, long_y = dx * speed * 3, dy * speed * 3
+      short_x, short_y = -dy * speed * 0.5, dx * speed * 0.5
+
+      ## Colorkeyed rather than per pixel alpha, blits several times faster
+      surf = pygame.Surface((half * 2 + 1, half * 2 + 1))
+      pygame.draw.polygon(surf, (255, 255, 255), (
+        (half + long_x, half + long_y),
+        (half + short_x, half + short_y),
+        (half - long_x, half - long_y),
+        (half - short_x, half - short_y),
+      ))
+      surf.set_colorkey((0, 0, 0))
+      sprite = (surf, half)
+      self.sprites[key] = sprite
+    return sprite
+
+  def render(self, surf, offset = (0, 0), alpha = 1.0):
+    x, y, dx, dy, speed, bucket = self.x, self.y, self.dx, self.dy, self.speed, self.bucket
+    ox, oy = offset[0], offset[1]
+    sprites, sprite = self.sprites, self.sprite
+    ## The last update moved each spark by its speed before slowing it by 0.1,
+    ## so it was (speed + 0.1) back along its direction one tick ago
+    back = 1 - alpha
+
+    blits = []
+    for i in range(self.count):
+      s = speed[i]
+      key = (bucket[i], int(s * SPEED_STEPS + 0.5))
+      image = sprites.get(key) or sprite(key[0], key[1])
+      step = (s + 0.1) * back
+      blits.append((image[0], (round(x[i] - dx[i] * step - ox) - image[1], round(y[i] - dy[i] * step - oy) - image[1])))
+    surf.blits(blits, False)
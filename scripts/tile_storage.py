@@ -0,0 +1,107 @@
+CHUNK_SHIFT = 3
+CHUNK_SIZE = 1 << CHUNK_SHIFT ## Tiles per chunk side
+CHUNK_MASK = CHUNK_SIZE - 1
+
+## Same order as tilemap.NEIGHBOR_OFFSETS
+NEIGHBORHOOD = [
+  (-1,  1),  (0,  1), (1,  1),
+  (-1,  0),  (0,  0), (1,  0),
+  (-1, -1),  (0, -1), (1, -1),
+]
+
+def chunk_of(x, y):
+  return (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+
+class ChunkedTiles:
+  # Tiles keyed by integer (x, y) grid coordinates.
+  # Every chunk is a flat list of CHUNK_SIZE * CHUNK_SIZE slots (None when empty),
+  # so a lookup is one dict access for the chunk plus one list index.
+  # `>>` and `&` floor negative coordinates, so chunks tile the whole plane.
+
+  def __init__(self):
+    self.chunks = {}
+    self.count = 0
+
+  def get(self, x, y):
+    chunk = self.chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+    if chunk is None:
+      return None
+    return chunk[((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)]
+
+  def set(self, x, y, tile):
+    chunk_loc = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+    chunk = self.chunks.get(chunk_loc)
+    if chunk is None:
+      chunk = [None] * (CHUNK_SIZE * CHUNK_SIZE)
+      self.chunks[chunk_loc] = chunk
+
+    i = ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+    if chunk[i] is None:
+      self.count += 1
+    chunk[i] = tile
+
+  def remove(self, x, y):
+    chunk_loc = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+    chunk = self.chunks.get(chunk_loc)
+    if chunk is None:
+      return None
+
+    i = ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+    tile = chunk[i]
+    if tile is not None:
+      chunk[i] = None
+      self.count -= 1
+      if not any(chunk):
+        del self.chunks[chunk_loc]
+    return tile
+
+  def clear(self):
+    self.chunks = {}
+    self.count = 0
+
+  def neighborhood(self, x, y):
+    # 3x3 block of tiles centered on (x, y), skipping empty slots.
+    # When the whole block sits inside a single chunk it is read with one dict lookup.
+    lx = x & CHUNK_MASK
+    ly = y & CHUNK_MASK
+
+    if 0 < lx < CHUNK_MASK and 0 < ly < CHUNK_MASK:
+      chunk = self.chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+      if chunk is None:
+        return []
+      base = (ly << CHUNK_SHIFT) | lx
+      tiles = []
+      for offset in NEIGHBORHOOD:
+        tile = chunk[base + (offset[1] << CHUNK_SHIFT) + offset[0]]
+        if tile is not None:
+          tiles.append(tile)
+      return tiles
+
+    tiles = []
+    for offset in NEIGHBORHOOD:
+      tile = self.get(x + offset[0], y + offset[1])
+      if tile is not None:
+        tiles.append(tile)
+    return tiles
+
+  def chunk_tiles(self, chunk_loc):
+    # (x, y, tile) for every tile stored in the chunk
+    chunk = self.chunks.get(chunk_loc)
+    if chunk is None:
+      return
+    base_x = chunk_loc[0] << CHUNK_SHIFT
+    base_y = chunk_loc[1] << CHUNK_SHIFT
+    for i, tile in enumerate(chunk):
+      if tile is not None:
+        yield (base_x + (i & CHUNK_MASK), base_y + (i >> CHUNK_SHIFT), tile)
+
+  def items(self):
+    for chunk_loc in list(self.chunks):
+      yield from self.chunk_tiles(chunk_loc)
+
+  def __iter__(self):
+    for x, y, _ in self.items():
+      yield (x, y)
+
+  def __len__(self):
+    return self.count
@@ -1,7 +1,14 @@
 import json
+import itertools
 import pygame
 from dict_hash import dict_hash
 
+from scripts.map_format import BINARY_MAP_EXTENSION, read_binary_map, read_json_map
+from scripts.offgrid_index import OffgridIndex
+from scripts.render_cache import ChunkRenderCache
+from scripts.solid_grid import SolidGrid
+from scripts.tile_storage import CHUNK_MASK, CHUNK_SHIFT, CHUNK_SIZE, ChunkedTiles
+
 NEIGHBOR_OFFSETS = [
   (-1,  1),  (0,  1), (1,  1),   ## DOWN_LEFT, DOWN,   DOWN_RIGHT
   (-1,  0),  (0,  0), (1,  0),  ## LEFT,      CENTER, RIGHT
@@ -20,29 +27,93 @@ AUTOTILE_MAP = {
   tuple(sorted([(0, -1), (0, 1), (1, 0)])): 7,
   tuple(sorted([(-1, 0), (0, -1), (0, 1), (1, 0)])): 8,
 }
+## AUTOTILE_MAP by neighbour bitmask, one bit per direction (None: keep the variant)
+AUTOTILE_SHIFTS = [(1, (-1, 0)), (2, (0, -1)), (4, (0, 1)), (8, (1, 0))]
+AUTOTILE_VARIANTS = [AUTOTILE_MAP.get(tuple(sorted(shift for bit, shift in AUTOTILE_SHIFTS if mask & bit))) for mask in range(16)]
 
 PHYSICS_TILES = { 'grass', 'stone' }
 
+## Shared by every Tilemap so a revision number never means two different states
+REVISIONS = itertools.count()
+
 class Tilemap:
   def __init__(self, game, tile_size = 16):
     self.game = game
     self.tile_size = tile_size
-    self.tilemap = {}
+    ## On grid tiles keyed by integer (x, y) coords, see ChunkedTiles
+    self.tilemap = ChunkedTiles()
+    ## Which cells hold a PHYSICS_TILES tile, kept in sync by set_tile/remove_tile
+    self.solid = SolidGrid()
     self.offgrid_tiles = []
+    self.offgrid_index = OffgridIndex()
+    self.render_cache = ChunkRenderCache(self)
+    ## Changes on every edit, lets restore() skip untouched maps
+    self.revision = next(REVISIONS)
 
   def tiles_around(self, pos): 
-    arround_tiles = []
-    tile_pos = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+    return self.tilemap.neighborhood(int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+
+  def set_tile(self, loc, tile):
+    tile['pos'] = [loc[0], loc[1]]
+    self.tilemap.set(loc[0], loc[1], tile)
+    self.solid.set(loc[0], loc[1], tile['type'] in PHYSICS_TILES)
+    self.render_cache.invalidate(loc)
+    self.revision = next(REVISIONS)
+
+  def remove_tile(self, loc):
+    self.render_cache.invalidate(loc)
+    self.revision = next(REVISIONS)
+    self.solid.set(loc[0], loc[1], False)
+    return self.tilemap.remove(loc[0], loc[1])
+
+  def add_offgrid(self, tile):
+    self.offgrid_tiles.append(tile)
+    self.offgrid_index.add(tile, self.game.assets[tile['type']][tile['variant']].get_size())
+    self.revision = next(REVISIONS)
+
+  def remove_offgrid(self, tile):
+    self.offgrid_index.remove(tile)
+    self.revision = next(REVISIONS)
+    for i, offgrid_tile in enumerate(self.offgrid_tiles):
+      if offgrid_tile is tile:
+        del self.offgrid_tiles[i]
+        break
+
+  def offgrid_at(self, pos):
+    return self.offgrid_index.at_point(pos)
+
+  def snapshot(self):
+    ## Copy of the current tiles that restore() can bring back without any file I/O
+    tiles = [((x, y), dict(tile)) for x, y, tile in self.tilemap.items()]
+    offgrid = [dict(tile) for tile in self.offgrid_tiles]
+    return (self.revision, self.tile_size, tiles, offgrid)
+
+  def restore(self, snapshot):
+    revision, tile_size, tiles, offgrid = snapshot
+    if revision == self.revision:
+      ## Nothing changed since the snapshot, keeps the render cache too
+      return
     
-    for neighboor_offset in NEIGHBOR_OFFSETS:
-      offset_location = str(tile_pos[0] + neighboor_offset[0]) + ';' + str(tile_pos[1] + neighboor_offset[1])
-      if offset_location in self.tilemap:
-        arround_tiles.append(self.tilemap[offset_location])
+    self.tile_size = tile_size
+    self.tilemap = ChunkedTiles()
+    self.solid.clear()
+    self.render_cache.clear()
+    for loc, tile in tiles:
+      self.set_tile(loc, dict(tile))
     
-    return arround_tiles
+    self.offgrid_tiles = []
+    self.offgrid_index.clear()
+    for tile in offgrid:
+      self.add_offgrid(dict(tile))
+    self.revision = revision
 
   def save(self, path):
-    file_content = {'tilemap': self.tilemap, 'offgrid': self.offgrid_tiles, 'tile_size': self.tile_size}
+    ## Map files keep the "x;y" string keys
+    tilemap = {}
+    for x, y, tile in self.tilemap.items():
+      tilemap[str(x) + ';' + str(y)] = tile
+    
+    file_content = {'tilemap': tilemap, 'offgrid': self.offgrid_tiles, 'tile_size': self.tile_size}
     
     if len(self.game.map_name) > 0:
       file_name = self.game.map_name
@@ -57,32 +128,82 @@ class Tilemap:
     
     file_connection.close()
 
-  def load(self, path, file_name):
-    file_connection = open(path + file_name, 'r') # Reading
-    
-    data = json.load(file_connection)
+  def load(self, path, file_name, autotile = False):
+    if file_name.endswith(BINARY_MAP_EXTENSION):
+      tile_size, tiles, offgrid = read_binary_map(path + file_name)
+    else:
+      tile_size, tiles, offgrid = read_json_map(path + file_name)
     
-    file_connection.close()
+    self.tile_size = tile_size
+    self.tilemap = ChunkedTiles()
+    self.solid.clear()
+    self.render_cache.clear()
+    for loc, tile in tiles:
+      self.set_tile(loc, tile)
     
+    self.offgrid_tiles = []
+    self.offgrid_index.clear()
+    for tile in offgrid:
+      self.add_offgrid(tile)
     
-    self.tilemap = data['tilemap']
-    self.offgrid_tiles = data['offgrid']
-    self.tile_size = data['tile_size']
+    if autotile:
+      self.autotile()
+  
+  def autotile_variant(self, x, y, tile_type):
+    get = self.tilemap.get
+    mask = 0
+    for bit, shift in AUTOTILE_SHIFTS:
+      neighbor = get(x + shift[0], y + shift[1])
+      if neighbor is not None and neighbor['type'] == tile_type:
+        mask |= bit
+    return AUTOTILE_VARIANTS[mask]
+  
+  def autotile_around(self, loc):
+    ## After an edit at loc only that tile and its 4 neighbours can change variant
+    for _, shift in [(0, (0, 0))] + AUTOTILE_SHIFTS:
+      x, y = loc[0] + shift[0], loc[1] + shift[1]
+      tile = self.tilemap.get(x, y)
+      if tile is not None and tile['type'] in AUTOTILE_TYPES:
+        variant = self.autotile_variant(x, y, tile['type'])
+        if variant is not None and variant != tile['variant']:
+          tile['variant'] = variant
+          self.render_cache.invalidate((x, y))
+          self.revision = next(REVISIONS)
   
   def autotile(self):
-    for coord in self.tilemap:
-      tile = self.tilemap[coord]
-      if tile['type'] in AUTOTILE_TYPES:
-        neighbors = set()
-        for shift in [(-1, 0), (0, -1), (0, 1), (1, 0)]:
-          check_loc = str(tile['pos'][0] + shift[0]) + ';' + str(tile['pos'][1] + shift[1])
-          if check_loc in self.tilemap:
-            tile_shift = self.tilemap[check_loc]
-            if(tile_shift['type'] == tile['type']):
-              neighbors.add(shift)
-        neighbors = tuple(sorted(neighbors))
-        if neighbors in AUTOTILE_MAP:
-          tile['variant'] = AUTOTILE_MAP[neighbors]
+    ## Whole map pass. Neighbours inside the same chunk are read straight from its
+    ## slots, only tiles on a chunk border go through ChunkedTiles.get.
+    ## Only the chunks with a changed tile get redrawn
+    get = self.tilemap.get
+    last = CHUNK_SIZE - 1
+    changed = []
+    for (cx, cy), chunk in self.tilemap.chunks.items():
+      for i, tile in enumerate(chunk):
+        if tile is None or tile['type'] not in AUTOTILE_TYPES:
+          continue
+        tile_type = tile['type']
+        lx, ly = i & CHUNK_MASK, i >> CHUNK_SHIFT
+        x, y = (cx << CHUNK_SHIFT) | lx, (cy << CHUNK_SHIFT) | ly
+        
+        left = chunk[i - 1] if lx > 0 else get(x - 1, y)
+        up = chunk[i - CHUNK_SIZE] if ly > 0 else get(x, y - 1)
+        down = chunk[i + CHUNK_SIZE] if ly < last else get(x, y + 1)
+        right = chunk[i + 1] if lx < last else get(x + 1, y)
+        mask = 0
+        if left is not None and left['type'] == tile_type: mask |= 1
+        if up is not None and up['type'] == tile_type: mask |= 2
+        if down is not None and down['type'] == tile_type: mask |= 4
+        if right is not None and right['type'] == tile_type: mask |= 8
+        
+        variant = AUTOTILE_VARIANTS[mask]
+        if variant is not None and variant != tile['variant']:
+          tile['variant'] = variant
+          changed.append((x, y))
+    
+    for loc in changed:
+      self.render_cache.invalidate(loc)
+    if changed:
+      self.revision = next(REVISIONS)
 
   def extract(self, id_pairs, keep = False):
     matches = []
@@ -90,48 +211,66 @@ class Tilemap:
       if (tile['type'], tile['variant']) in id_pairs:
         matches.append(tile.copy())
         if not keep:
-          self.offgrid_tiles.remove(tile)
+          self.remove_offgrid(tile)
     
     to_be_deleted = []
-    for loc in self.tilemap:
-      tile = self.tilemap[loc]
+    for x, y, tile in self.tilemap.items():
       if (tile['type'], tile['variant']) in id_pairs:
         matches.append(tile.copy())
         matches[-1]['pos'] = matches[-1]['pos'].copy()
         matches[-1]['pos'][0] = matches[-1]['pos'][0] * self.tile_size
         matches[-1]['pos'][1] = matches[-1]['pos'][1] * self.tile_size
         if not keep:
-          to_be_deleted.append(loc)
+          to_be_deleted.append((x, y))
     
     for loc in to_be_deleted:
-      del self.tilemap[loc]
+      self.remove_tile(loc)
     
     return matches
   
   def physics_rect_around(self, pos):
     rects:list[pygame.Rect] = []
-    for tile in self.tiles_around(pos):
-      if tile['type'] in PHYSICS_TILES:
-          rects.append(pygame.Rect(tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size, self.tile_size, self.tile_size))
+    tile_x = int(pos[0] // self.tile_size)
+    tile_y = int(pos[1] // self.tile_size)
+    for offset in NEIGHBOR_OFFSETS:
+      if self.solid.get(tile_x + offset[0], tile_y + offset[1]):
+        rects.append(pygame.Rect((tile_x + offset[0]) * self.tile_size, (tile_y + offset[1]) * self.tile_size, self.tile_size, self.tile_size))
     
     return rects
   
-  def render(self, surf, offset = (0, 0)):
-    for tile in self.offgrid_tiles:
-      surf.blit(self.game.assets[tile['type']][tile['variant']], (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1]))
-    
-    # Rendering only tiles on camera
-    # offset is in pixels, when divided by tile_size we get coord of tile in the top left corner 
-    # Then we get coord of the top right corner and move it right 1 unit
-    for x in range(offset[0] // self.tile_size, (offset[0] + surf.get_width()) // self.tile_size + 1):
-      for y in range(offset[1] // self.tile_size, (offset[1] + surf.get_height()) // self.tile_size + 1):
-        loc = str(x) + ';' + str(y)
-        if loc in self.tilemap:
-          tile = self.tilemap[loc]
-          surf.blit(self.game.assets[tile['type']][tile['variant']], (tile['pos'][0] * self.tile_size - offset[0], tile['pos'][1] * self.tile_size - offset[1]))
+  def sweep_x(self, left, top, width, height, new_left):
+    ## Slides a width x height box (whole pixels) from left to new_left.
+    ## Returns the first solid column the box runs into on the way, or None.
+    ## Every column between the start and the end is checked, so nothing is skipped at any speed
+    top_row, bottom_row = top // self.tile_size, (top + height - 1) // self.tile_size
+    if new_left > left:
+      return self.solid.first_column(left // self.tile_size, (new_left + width - 1) // self.tile_size, top_row, bottom_row)
+    if new_left < left:
+      return self.solid.first_column((left + width - 1) // self.tile_size, new_left // self.tile_size, top_row, bottom_row)
+    return None
   
-  def is_solid_block(self, pos):
-    tile_loc = str(int(pos[0] // self.tile_size)) + ';' + str(int(pos[1] // self.tile_size))
+  def sweep_y(self, left, top, width, height, new_top):
+    ## Same as sweep_x, vertically. Returns the first solid row or None
+    first_column, last_column = left // self.tile_size, (left + width - 1) // self.tile_size
+    if new_top > top:
+      return self.solid.first_row(top // self.tile_size, (new_top + height - 1) // self.tile_size, first_column, last_column)
+    if new_top < top:
+      return self.solid.first_row((top + height - 1) // self.tile_size, new_top // self.tile_size, first_column, last_column)
+    return None
+  
+  def render(self, surf, offset = (0, 0), outline = None):
+    # Rendering only off grid tiles on camera
+    view = pygame.Rect(offset[0], offset[1], surf.get_width(), surf.get_height())
+    for _, _, tile in self.offgrid_index.query(view):
+      img = self.game.assets[tile['type']][tile['variant']]
+      pos = (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1])
+      surf.blit(img, pos)
+      if outline:
+        outline.blit(img, pos)
     
-    if tile_loc in self.tilemap:
-      return self.tilemap[tile_loc]['type'] in PHYSICS_TILES
\ No newline at end of file
+    # On grid tiles never change during play, so they are drawn
+    # from pre-rendered chunk surfaces (see ChunkRenderCache)
+    self.render_cache.render(surf, offset, outline)
+  
+  def is_solid_block(self, pos):
+    return self.solid.get(int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
\ No newline at end of file
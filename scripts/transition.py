@@ -0,0 +1,62 @@
+import pygame
+
+TRANSITION_STEPS = 30 ## Game.transition runs from -TRANSITION_STEPS to TRANSITION_STEPS
+OPEN = (255, 255, 255) ## Colorkey, where the frame shows through
+CLOSED = (0, 0, 0)
+
+# Wipe shapes: draw(surf, step) paints the open part of the wipe in OPEN on a
+# CLOSED surface, step going from 0 (fully closed) to TRANSITION_STEPS (open).
+
+def draw_circle(surf, step):
+  pygame.draw.circle(surf, OPEN, (surf.get_width() // 2, surf.get_height() // 2), step * 8)
+
+def draw_diamond(surf, step):
+  center_x, center_y = surf.get_width() // 2, surf.get_height() // 2
+  radius = step * 12
+  pygame.draw.polygon(surf, OPEN, [(center_x, center_y - radius), (center_x + radius, center_y), (center_x, center_y + radius), (center_x - radius, center_y)])
+
+def draw_bars(surf, step):
+  ## Opens from the middle outwards, left and right
+  width = surf.get_width() * step // TRANSITION_STEPS
+  surf.fill(OPEN, pygame.Rect((surf.get_width() - width) // 2, 0, width, surf.get_height()))
+
+TRANSITION_SHAPES = {
+  'circle': draw_circle,
+  'diamond': draw_diamond,
+  'bars': draw_bars,
+}
+
+def register_shape(name, draw):
+  TRANSITION_SHAPES[name] = draw
+
+class TransitionEffect:
+  # Only TRANSITION_STEPS + 1 different wipe frames ever show up, each one is
+  # drawn the first time it is needed and kept per (shape, display size).
+  # Rendering a transition is then a single colorkeyed blit.
+
+  def __init__(self, shape = 'circle'):
+    self.shape = shape
+    self.frames = {}
+
+  def frame(self, size, step):
+    key = (self.shape, size)
+    frames = self.frames.get(key)
+    if frames is None:
+      frames = [None] * (TRANSITION_STEPS + 1)
+      self.frames[key] = frames
+
+    surf = frames[step]
+    if surf is None:
+      surf = pygame.Surface(size)
+      surf.fill(CLOSED)
+      TRANSITION_SHAPES[self.shape](surf, step)
+      surf.set_colorkey(OPEN, pygame.RLEACCEL)
+      frames[step] = surf
+    return surf
+
+  def render(self, surf, transition):
+    if not transition:
+      return
+    ## Past TRANSITION_STEPS (level end) the screen stays fully closed
+    step = max(0, TRANSITION_STEPS - abs(transition))
+    surf.blit(self.frame(surf.get_size(), step), (0, 0))
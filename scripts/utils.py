@@ -31,6 +31,14 @@ def load_sounds(folder, vol):
   
   return sounds
 
+class NullSound:
+  ## Stands in for pygame.mixer.Sound when running without audio
+  def play(self, *args, **kwargs):
+    pass
+  
+  def set_volume(self, vol):
+    pass
+
 class Mouse_button(Enum):
   L_CLICK = 1
   M_CLICK = 2
@@ -0,0 +1,103 @@
+import os
+import sys
+import math
+import random
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from scripts.animations import Animation
+from scripts.particle import ParticleSystem
+
+
+class Particle:
+  ## The per object particle ParticleSystem replaced, as it was
+  def __init__(self, game, particle_type, pos, velocity=[0,0], frame=0):
+    self.game = game
+    self.p_type = particle_type
+    self.pos = list(pos)
+    self.velocity = list(velocity)
+    self.animation = self.game.assets['particles'][self.p_type].copy()
+    self.animation.frame = frame
+
+  def update(self):
+    kill = False
+    if self.animation.done:
+      kill = True
+
+    self.pos[0] = self.pos[0] + self.velocity[0]
+    self.pos[1] = self.pos[1] + self.velocity[1]
+    self.animation.update()
+
+    return kill
+
+  def render(self, surf, offset=(0,0)):
+    img = self.animation.img()
+    surf.blit(img, (self.pos[0] - offset[0] - img.get_width() // 2, self.pos[1] - offset[1] - img.get_height() // 2))
+
+
+class DrawLog:
+  ## Stands in for the display, keeps what got drawn where
+  def __init__(self):
+    self.draws = []
+
+  def blit(self, img, pos):
+    self.draws.append((id(img), pos[0], pos[1]))
+
+  def blits(self, batch, doreturn = True):
+    for img, pos in batch:
+      self.blit(img, pos)
+
+
+class Game:
+  def __init__(self):
+    self.assets = {
+      'particles': {
+        'leaf': Animation([pygame.Surface((5 + i % 3, 4)) for i in range(18)], img_dur=20, loop=False),
+        'dash': Animation([pygame.Surface((3 + i, 3 + i)) for i in range(4)], img_dur=6, loop=False),
+      }
+    }
+
+
+def sorted_draws(log):
+  return sorted((img, round(x, 6), round(y, 6)) for img, x, y in log.draws)
+
+
+def test_draw_positions_match_particle_objects():
+  game = Game()
+  system = ParticleSystem(game)
+  particles = []
+  rng = random.Random(3)
+  offset = (12, -7)
+
+  for tick in range(400):
+    ## Spawned the same way game.py does it, leaves from trees and dash bursts
+    for _ in range(rng.randint(0, 2)):
+      pos = (rng.uniform(0, 300), rng.uniform(0, 200))
+      frame = rng.randint(0, 20)
+      system.spawn('leaf', pos, (-0.1, 0.3), frame=frame)
+      particles.append(Particle(game, 'leaf', pos, velocity=[-0.1, 0.3], frame=frame))
+    if tick % 50 == 0:
+      for _ in range(10):
+        pos = (rng.uniform(0, 300), rng.uniform(0, 200))
+        velocity = (math.cos(rng.random() * math.tau) * 2, math.sin(rng.random() * math.tau) * 2)
+        frame = rng.randint(0, 7)
+        system.spawn('dash', pos, velocity, frame=frame)
+        particles.append(Particle(game, 'dash', pos, velocity=list(velocity), frame=frame))
+
+    expected = DrawLog()
+    for particle in particles.copy():
+      kill = particle.update()
+      particle.render(expected, offset=offset)
+      if particle.p_type == 'leaf':
+        particle.pos[0] += math.sin(particle.animation.frame * 0.035) * 0.3
+      if kill:
+        particles.remove(particle)
+
+    drawn = DrawLog()
+    system.update()
+    system.render(drawn, offset)
+
+    assert sorted_draws(drawn) == sorted_draws(expected), tick